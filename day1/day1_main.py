@@ -1,8 +1,24 @@
+from array import array
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+from itertools import groupby
+from math import isqrt
+import mmap
+import os
 import re
-from typing import List, Tuple
+import tempfile
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 INPUT_PATH = "inp.txt"
+ENGINES = ("python", "numpy", "external")
+LINE_PATTERN = re.compile(r"(\d+)\s+(\d+)")
+BYTES_LINE_PATTERN = re.compile(rb"(\d+)[ \t]+(\d+)")
 
 def read_data(inp_path: str) -> Tuple[List[int], List[int]]:
     """Parse the input data.
@@ -30,7 +46,42 @@ def read_data(inp_path: str) -> Tuple[List[int], List[int]]:
                 col1_data.append(int(matches[1]))
         return col0_data, col1_data
 
-def get_distance_sum(col0: List[int], col1: List[int]) -> int:
+def read_data_mmap(inp_path: str) -> Tuple[array, array]:
+    """Parse the input data from a memory-mapped file.
+
+    Scans the raw bytes of the file for the two
+    integer columns without decoding or splitting
+    it into lines, storing the values in compact
+    signed 64-bit arrays.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input data filepath.
+
+    Returns
+    -------
+    array
+        Data from the first column.
+    array
+        Data from the second column.
+
+    """
+    col0_data = array("q")
+    col1_data = array("q")
+    with open(inp_path, "rb") as input_file:
+        try:
+            mapped = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be memory-mapped.
+            return col0_data, col1_data
+        with mapped:
+            for match in BYTES_LINE_PATTERN.finditer(mapped):
+                col0_data.append(int(match.group(1)))
+                col1_data.append(int(match.group(2)))
+    return col0_data, col1_data
+
+def get_distance_sum(col0: Sequence[int], col1: Sequence[int]) -> int:
     """Calculate the distance sum of the data.
     
     Calculates the sum of the distances between
@@ -40,9 +91,9 @@ def get_distance_sum(col0: List[int], col1: List[int]) -> int:
 
     Parameters
     ----------
-    col0 : List[int]
+    col0 : Sequence[int]
         Data from the first column.
-    col1 : List[int]
+    col1 : Sequence[int]
         Data from the second column.
     
     Returns
@@ -56,7 +107,7 @@ def get_distance_sum(col0: List[int], col1: List[int]) -> int:
         total += abs(val0 - val1)
     return total
 
-def get_similarity_score(col0: List[int], col1: List[int]) -> int:
+def get_similarity_score(col0: Sequence[int], col1: Sequence[int]) -> int:
     """Calculate the similarity score of the data.
     
     Calculates similarity score between the two
@@ -65,9 +116,9 @@ def get_similarity_score(col0: List[int], col1: List[int]) -> int:
 
     Parameters
     ----------
-    col0 : List[int]
+    col0 : Sequence[int]
         Data from the first column.
-    col1 : List[int]
+    col1 : Sequence[int]
         Data from the second column.
     
     Returns
@@ -76,27 +127,494 @@ def get_similarity_score(col0: List[int], col1: List[int]) -> int:
         The similarity score of the data.
     
     """
-    cnt0 = Counter(col0)
-    cnt1 = Counter(col1)
+    return _score_counts(Counter(col0), Counter(col1))
+
+def _score_counts(cnt0: Counter, cnt1: Counter) -> int:
+    """Calculate the similarity score from value counts."""
     total = 0
     for val in cnt0.keys():
         if val in cnt1:
             total += cnt0[val]*val*cnt1[val]
     return total
 
+def _require_numpy() -> None:
+    """Raise if NumPy is not available."""
+    if np is None:
+        raise ImportError("The numpy engine requires NumPy to be installed.")
+
+def get_distance_sum_np(col0: Sequence[int], col1: Sequence[int]) -> int:
+    """Calculate the distance sum of the data using NumPy.
+
+    Vectorized equivalent of `get_distance_sum`.
+
+    Parameters
+    ----------
+    col0 : Sequence[int]
+        Data from the first column.
+    col1 : Sequence[int]
+        Data from the second column.
+
+    Returns
+    -------
+    int
+        The sum of the sorted data point distances.
+
+    """
+    _require_numpy()
+    sorted0 = np.sort(np.asarray(col0, dtype=np.int64))
+    sorted1 = np.sort(np.asarray(col1, dtype=np.int64))
+    if not len(sorted0):
+        return 0
+    # Wrapped int64 differences are exact when read as uint64.
+    dists = (np.maximum(sorted0, sorted1) - np.minimum(sorted0, sorted1)).view(np.uint64)
+    if int(dists.max()) <= np.iinfo(np.int64).max//len(dists):
+        return int(dists.sum(dtype=np.int64))
+    # The int64 sum could overflow, add up as Python ints.
+    return sum(dists.tolist())
+
+def get_similarity_score_np(col0: Sequence[int], col1: Sequence[int]) -> int:
+    """Calculate the similarity score of the data using NumPy.
+
+    Vectorized equivalent of `get_similarity_score`.
+    The unique values of column 0 are looked up in
+    the sorted unique values of column 1.
+
+    Parameters
+    ----------
+    col0 : Sequence[int]
+        Data from the first column.
+    col1 : Sequence[int]
+        Data from the second column.
+
+    Returns
+    -------
+    int
+        The similarity score of the data.
+
+    """
+    _require_numpy()
+    vals0, cnt0 = np.unique(np.asarray(col0, dtype=np.int64), return_counts=True)
+    vals1, cnt1 = np.unique(np.asarray(col1, dtype=np.int64), return_counts=True)
+    if not len(vals0) or not len(vals1):
+        return 0
+    idx = np.searchsorted(vals1, vals0)
+    idx[idx == len(vals1)] = 0
+    found = vals1[idx] == vals0
+    # Products are added up as Python ints, as they may overflow int64.
+    return sum(
+        val*count0*count1
+        for val, count0, count1 in zip(
+            vals0[found].tolist(), cnt0[found].tolist(), cnt1[idx[found]].tolist()
+        )
+    )
+
+class IncrementalListScorer:
+    """Running distance sum and similarity score.
+
+    The distance sum is kept as the sum of `|D(x)|`
+    over every value `x` in `[0, max_value]`, where
+    `D(x)` is the number of column 0 values `<= x`
+    minus the number of column 1 values `<= x`.
+    Adding or removing a pair `(left, right)` shifts
+    `D` by one between `left` and `right`, which is
+    applied over square-root sized blocks, so each
+    update costs `O(sqrt(max_value))` regardless of
+    the number of pairs held.
+
+    Parameters
+    ----------
+    max_value : int
+        Largest value that may be inserted.
+
+    """
+
+    def __init__(self, max_value: int) -> None:
+        if max_value < 0:
+            raise ValueError("Maximum value must be non-negative.")
+        size = max_value + 1
+        self.max_value = max_value
+        self.cnt0: Counter = Counter()
+        self.cnt1: Counter = Counter()
+        self.similarity_score = 0
+        self._block_size = max(1, isqrt(size))
+        num_blocks = (size + self._block_size - 1)//self._block_size
+        self._base = array("q", bytes(8*size))
+        self._lazy = [0]*num_blocks
+        self._block_len = [min(self._block_size, size - blk*self._block_size)
+                           for blk in range(num_blocks)]
+        self._hist = [Counter({0: blen}) for blen in self._block_len]
+        self._nonneg = self._block_len[:]
+        self._abs_sum = [0]*num_blocks
+        self._total = 0
+
+    def __len__(self) -> int:
+        return sum(self.cnt0.values())
+
+    @property
+    def distance_sum(self) -> int:
+        """The distance sum of the pairs held."""
+        return self._total
+
+    def insert(self, left: int, right: int) -> None:
+        """Add a pair to the scorer.
+
+        Parameters
+        ----------
+        left : int
+            Value to add to the first column.
+        right : int
+            Value to add to the second column.
+
+        """
+        self._check_value(left)
+        self._check_value(right)
+        self.similarity_score += left*self.cnt1[left]
+        self.cnt0[left] += 1
+        self.similarity_score += right*self.cnt0[right]
+        self.cnt1[right] += 1
+        self._shift(left, right, 1)
 
-def main() -> None:
-    """Script main function."""
-    col0_data, col1_data = read_data(INPUT_PATH)
+    def remove(self, left: int, right: int) -> None:
+        """Remove a pair from the scorer.
+
+        Parameters
+        ----------
+        left : int
+            Value to remove from the first column.
+        right : int
+            Value to remove from the second column.
+
+        """
+        if self.cnt0[left] < 1 or self.cnt1[right] < 1:
+            raise KeyError(f"Pair ({left}, {right}) is not held by the scorer.")
+        self.cnt1[right] -= 1
+        self.similarity_score -= right*self.cnt0[right]
+        self.cnt0[left] -= 1
+        self.similarity_score -= left*self.cnt1[left]
+        for cnt, val in ((self.cnt0, left), (self.cnt1, right)):
+            if not cnt[val]:
+                del cnt[val]
+        self._shift(left, right, -1)
+
+    def _check_value(self, val: int) -> None:
+        if not 0 <= val <= self.max_value:
+            raise ValueError(f"Value {val} is outside of [0, {self.max_value}].")
+
+    def _shift(self, left: int, right: int, sign: int) -> None:
+        # D rises on [left, right) when a pair is added, falls on [right, left).
+        if left < right:
+            self._range_add(left, right, sign)
+        elif right < left:
+            self._range_add(right, left, -sign)
+
+    def _range_add(self, start: int, stop: int, step: int) -> None:
+        bsize = self._block_size
+        first_blk = start//bsize
+        last_blk = (stop - 1)//bsize
+        if first_blk == last_blk:
+            self._cell_add(first_blk, start, stop, step)
+            return
+        self._cell_add(first_blk, start, (first_blk + 1)*bsize, step)
+        for blk in range(first_blk + 1, last_blk):
+            self._block_add(blk, step)
+        self._cell_add(last_blk, last_blk*bsize, stop, step)
+
+    def _cell_add(self, blk: int, start: int, stop: int, step: int) -> None:
+        base = self._base
+        hist = self._hist[blk]
+        lazy = self._lazy[blk]
+        delta = 0
+        nonneg = 0
+        for idx in range(start, stop):
+            old = base[idx]
+            hist[old] -= 1
+            hist[old + step] += 1
+            base[idx] = old + step
+            delta += abs(old + step + lazy) - abs(old + lazy)
+            nonneg += (old + step + lazy >= 0) - (old + lazy >= 0)
+        self._abs_sum[blk] += delta
+        self._nonneg[blk] += nonneg
+        self._total += delta
+
+    def _block_add(self, blk: int, step: int) -> None:
+        hist = self._hist[blk]
+        lazy = self._lazy[blk]
+        size = self._block_len[blk]
+        if step > 0:
+            # Values >= 0 grow, values <= -1 shrink; -1 becomes 0.
+            delta = 2*self._nonneg[blk] - size
+            self._nonneg[blk] += hist[-lazy - 1]
+        else:
+            # Values >= 1 shrink, values <= 0 grow; 0 becomes -1.
+            positive = self._nonneg[blk] - hist[-lazy]
+            delta = size - 2*positive
+            self._nonneg[blk] = positive
+        self._lazy[blk] = lazy + step
+        self._abs_sum[blk] += delta
+        self._total += delta
+
+def _write_run(run_dir: str, name: str, values: List[int]) -> str:
+    """Sort values and write them to a binary run file."""
+    path = os.path.join(run_dir, name)
+    with open(path, "wb") as run_file:
+        array("q", sorted(values)).tofile(run_file)
+    return path
+
+def _iter_run(run_file: BinaryIO, buffer_size: int) -> Iterator[int]:
+    """Yield the values of a run file in bounded blocks."""
+    while True:
+        block = array("q")
+        try:
+            block.fromfile(run_file, buffer_size)
+        except EOFError:
+            # Partial final block, `block` holds what was read.
+            yield from block
+            return
+        yield from block
+
+def _merge_run_group(paths: List[str], out_path: str, buffer_size: int) -> None:
+    """Merge sorted run files into a single sorted run file."""
+    files = [open(path, "rb") for path in paths]
+    try:
+        with open(out_path, "wb") as out_file:
+            block = array("q")
+            for val in heapq.merge(*(_iter_run(f, buffer_size) for f in files)):
+                block.append(val)
+                if len(block) >= buffer_size:
+                    block.tofile(out_file)
+                    block = array("q")
+            block.tofile(out_file)
+    finally:
+        for run_file in files:
+            run_file.close()
+    for path in paths:
+        os.remove(path)
+
+def _merge_runs(paths: List[str], buffer_size: int, max_open_runs: int) -> Optional[str]:
+    """Merge run files in passes of at most `max_open_runs` files.
+
+    Returns the path of the single remaining run,
+    `None` if there are no runs.
+    """
+    merge_pass = 0
+    while len(paths) > 1:
+        merged = []
+        for idx in range(0, len(paths), max_open_runs):
+            group = paths[idx:idx + max_open_runs]
+            if len(group) == 1:
+                merged.append(group[0])
+                continue
+            out_path = f"{group[0]}_m{merge_pass}"
+            _merge_run_group(group, out_path, buffer_size)
+            merged.append(out_path)
+        paths = merged
+        merge_pass += 1
+    return paths[0] if paths else None
+
+def _iter_run_groups(path: str, buffer_size: int) -> Iterator[Tuple[int, int]]:
+    """Yield `(value, count)` pairs of a sorted run file."""
+    with open(path, "rb") as run_file:
+        for val, group in groupby(_iter_run(run_file, buffer_size)):
+            yield val, sum(1 for _ in group)
+
+def _spill_sorted_runs(
+    inp_path: str,
+    run_dir: str,
+    chunk_size: int
+) -> Tuple[List[str], List[str]]:
+    """Split the input into sorted run files per column."""
+    runs0: List[str] = []
+    runs1: List[str] = []
+    col0_data: List[int] = []
+    col1_data: List[int] = []
+    with open(inp_path, "r", encoding="utf-8") as input_file:
+        for line in input_file:
+            match = LINE_PATTERN.search(line)
+            if match is None:
+                continue
+            col0_data.append(int(match.group(1)))
+            col1_data.append(int(match.group(2)))
+            if len(col0_data) >= chunk_size:
+                runs0.append(_write_run(run_dir, f"col0_{len(runs0)}", col0_data))
+                runs1.append(_write_run(run_dir, f"col1_{len(runs1)}", col1_data))
+                col0_data.clear()
+                col1_data.clear()
+    if col0_data:
+        runs0.append(_write_run(run_dir, f"col0_{len(runs0)}", col0_data))
+        runs1.append(_write_run(run_dir, f"col1_{len(runs1)}", col1_data))
+    return runs0, runs1
+
+def get_scores_external(
+    inp_path: str,
+    chunk_size: int = 1_000_000,
+    buffer_size: int = 8192,
+    max_open_runs: int = 64
+) -> Tuple[int, int]:
+    """Calculate both scores of data too large for memory.
+
+    The input is read `chunk_size` pairs at a time and
+    each column chunk is spilled to a sorted temporary
+    run file. The runs of each column are k-way merged
+    in passes of at most `max_open_runs` files until a
+    single sorted run per column is left. The two runs
+    are read in lockstep for the distance sum, then
+    read again as run-length counts and joined for the
+    similarity score. Memory use is bounded by
+    `chunk_size` during the split and by `buffer_size`
+    per open run during the merge.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input data filepath.
+    chunk_size : int
+        Maximum number of pairs held in memory
+        while creating the sorted runs.
+    buffer_size : int
+        Number of values read at a time from
+        each run file during the merge.
+    max_open_runs : int
+        Maximum number of run files merged at once.
+
+    Returns
+    -------
+    int
+        The sum of the sorted data point distances.
+    int
+        The similarity score of the data.
+
+    """
+    if chunk_size < 1 or buffer_size < 1:
+        raise ValueError("Chunk and buffer sizes must be positive.")
+    if max_open_runs < 2:
+        raise ValueError("At least two runs must be merged at a time.")
+    with tempfile.TemporaryDirectory() as run_dir:
+        runs0, runs1 = _spill_sorted_runs(inp_path, run_dir, chunk_size)
+        run0 = _merge_runs(runs0, buffer_size, max_open_runs)
+        run1 = _merge_runs(runs1, buffer_size, max_open_runs)
+        if run0 is None or run1 is None:
+            return 0, 0
+
+        distance = 0
+        with open(run0, "rb") as file0, open(run1, "rb") as file1:
+            for val0, val1 in zip(_iter_run(file0, buffer_size), _iter_run(file1, buffer_size)):
+                distance += abs(val0 - val1)
+
+        similarity = 0
+        groups0 = _iter_run_groups(run0, buffer_size)
+        groups1 = _iter_run_groups(run1, buffer_size)
+        group0 = next(groups0, None)
+        group1 = next(groups1, None)
+        while group0 is not None and group1 is not None:
+            if group0[0] < group1[0]:
+                group0 = next(groups0, None)
+            elif group0[0] > group1[0]:
+                group1 = next(groups1, None)
+            else:
+                similarity += group0[0]*group0[1]*group1[1]
+                group0 = next(groups0, None)
+                group1 = next(groups1, None)
+        groups0.close()
+        groups1.close()
+    return distance, similarity
+
+def _get_byte_ranges(inp_path: str, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split a file into newline-aligned byte ranges."""
+    file_size = os.path.getsize(inp_path)
+    ranges = []
+    with open(inp_path, "rb") as input_file:
+        start = 0
+        while start < file_size:
+            input_file.seek(min(start + chunk_size, file_size))
+            input_file.readline()
+            stop = min(input_file.tell(), file_size)
+            ranges.append((start, stop))
+            start = stop
+    return ranges
+
+def _count_byte_range(inp_path: str, start: int, stop: int) -> Tuple[Counter, Counter]:
+    """Count the column values within a byte range of the input."""
+    cnt0: Counter = Counter()
+    cnt1: Counter = Counter()
+    with open(inp_path, "rb") as input_file:
+        input_file.seek(start)
+        data = input_file.read(stop - start)
+    for match in BYTES_LINE_PATTERN.finditer(data):
+        cnt0[int(match.group(1))] += 1
+        cnt1[int(match.group(2))] += 1
+    return cnt0, cnt1
+
+def get_similarity_score_parallel(
+    inp_path: str,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 16*1024*1024
+) -> int:
+    """Calculate the similarity score of a file using a process pool.
+
+    The file is split into newline-aligned byte ranges
+    of roughly `chunk_size` bytes, each range is counted
+    in a worker process and the partial counts are
+    merged before scoring.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input data filepath.
+    max_workers : Optional[int]
+        Number of worker processes, defaults to
+        the number of processors on the machine.
+    chunk_size : int
+        Approximate number of bytes per range.
+
+    Returns
+    -------
+    int
+        The similarity score of the data.
+
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive.")
+    ranges = _get_byte_ranges(inp_path, chunk_size)
+    cnt0: Counter = Counter()
+    cnt1: Counter = Counter()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_count_byte_range, inp_path, start, stop)
+                   for start, stop in ranges]
+        for future in futures:
+            part0, part1 = future.result()
+            cnt0.update(part0)
+            cnt1.update(part1)
+    return _score_counts(cnt0, cnt1)
+
+
+def main(engine: str = "python") -> None:
+    """Script main function.
+
+    Parameters
+    ----------
+    engine : str
+        Scoring backend, one of `ENGINES`.
+
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}.")
+    if engine == "external":
+        distance, similarity = get_scores_external(INPUT_PATH)
+    else:
+        if engine == "numpy":
+            distance_func, similarity_func = get_distance_sum_np, get_similarity_score_np
+        else:
+            distance_func, similarity_func = get_distance_sum, get_similarity_score
+        col0_data, col1_data = read_data_mmap(INPUT_PATH)
+        distance = distance_func(col0_data, col1_data)
+        similarity = similarity_func(col0_data, col1_data)
     print("Part I")
     print("-------")
-    outp = get_distance_sum(col0_data, col1_data)
-    print(f"Result: {outp}")
+    print(f"Result: {distance}")
     print("=============================")
     print("Part II")
     print("-------")
-    outp = get_similarity_score(col0_data, col1_data)
-    print(f"Result: {outp}")
+    print(f"Result: {similarity}")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,17 @@
 import re
-from typing import List, Generator
+from typing import (
+    Any, BinaryIO, Dict, Iterable, List, Generator, Optional, Sequence, Tuple, Union
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 INPUT_PATH = "inp.txt"
+METRICS = ("strict", "dampened", "verdicts")
+
+ReportSource = Union[str, BinaryIO, Iterable[List[int]]]
 
 def read_reports(inp_path: str) -> Generator[List[int], None, None]:
     """Parse input data.
@@ -20,12 +30,52 @@ def read_reports(inp_path: str) -> Generator[List[int], None, None]:
         input data line-by-line.
     
     """
-    with open(inp_path, "r", encoding="utf-8") as input_file:
-        for line in input_file.readlines():
-            if not line:
-                continue
-            data = re.findall("\d+", line)
-            yield [int(x) for x in data]
+    with open(inp_path, "rb") as input_file:
+        yield from read_report_stream(input_file)
+
+def read_report_stream(stream: BinaryIO) -> Generator[List[int], None, None]:
+    """Parse input data from an open stream.
+
+    Parameters
+    ----------
+    stream : BinaryIO
+        Binary stream of report lines, e.g. an
+        open file or `sys.stdin.buffer`.
+
+    Returns
+    -------
+    Generator[List[int], None, None]
+        Generator object which yields preprocessed
+        input data line-by-line.
+
+    """
+    for line in stream:
+        data = re.findall(rb"\d+", line)
+        if not data:
+            continue
+        yield [int(x) for x in data]
+
+def iter_reports(source: ReportSource) -> Generator[List[int], None, None]:
+    """Yield the reports of any supported source.
+
+    Parameters
+    ----------
+    source : ReportSource
+        Input filepath, open binary stream or
+        iterable of already parsed reports.
+
+    Returns
+    -------
+    Generator[List[int], None, None]
+        Generator object which yields the reports.
+
+    """
+    if isinstance(source, str):
+        yield from read_reports(source)
+    elif hasattr(source, "read"):
+        yield from read_report_stream(source)
+    else:
+        yield from source
 
 def is_safe(report: List[int]) -> bool:
     """Determine if a report is safe.
@@ -43,6 +93,8 @@ def is_safe(report: List[int]) -> bool:
     
     """
     diffs = [x - y for x, y in zip(report[:-1], report[1:])]
+    if not diffs:
+        return True
     if 0 in diffs:
         return False
     if abs(sum([x/abs(x) for x in diffs])) != len(diffs):
@@ -66,41 +118,223 @@ def is_safe_dampened(report: List[int]) -> bool:
         `False` if the report is not safe.
     
     """
-    if is_safe(report):
+    if len(report) <= 2:
         return True
-    for idx in range(len(report)):
-        if is_safe(report[:idx] + report[idx+1:]):
+    for direction in (1, -1):
+        bad_idx = _first_bad_step(report, direction)
+        if bad_idx is None:
             return True
+        # One of the two levels of the first bad step has to go.
+        for skip in (bad_idx, bad_idx + 1):
+            if _first_bad_step(report, direction, skip, max(bad_idx - 1, 0)) is None:
+                return True
     return False
 
-def get_num_safe_reports(dampened: bool = False) -> int:
+def _first_bad_step(
+    report: List[int],
+    direction: int,
+    skip: Optional[int] = None,
+    start: int = 0
+) -> Optional[int]:
+    """Find the first unsafe step of a report.
+
+    Parameters
+    ----------
+    report : List[int]
+        The report to evaluate.
+    direction : int
+        `1` for increasing reports, `-1` for decreasing.
+    skip : Optional[int]
+        Index of a level to leave out of the report.
+    start : int
+        Index of the level to start checking from.
+
+    Returns
+    -------
+    Optional[int]
+        Index of the level starting the first unsafe
+        step, `None` if every step is safe.
+
+    """
+    prev_idx = None
+    for idx in range(start, len(report)):
+        if idx == skip:
+            continue
+        if prev_idx is not None:
+            step = (report[idx] - report[prev_idx])*direction
+            if step < 1 or step > 3:
+                return prev_idx
+        prev_idx = idx
+    return None
+
+def get_num_safe_reports(dampened: bool = False, source: ReportSource = INPUT_PATH) -> int:
     """Get the number of safe reports.
-    
+
+    Parameters
+    ----------
+    dampened : bool
+        If `True`, count reports that are safe after dampening.
+    source : ReportSource
+        Input filepath, open binary stream or
+        iterable of already parsed reports.
+
     Returns
     -------
     int
         The number of safe reports.
     
     """
-    total = 0
-    for report in read_reports(INPUT_PATH):
-        if dampened and is_safe_dampened(report):
-            total += 1
-        elif is_safe(report):
-            total += 1
-    return total
+    metric = "dampened" if dampened else "strict"
+    return get_report_metrics(source, (metric,))[metric]
+
+def iter_report_verdicts(
+    source: ReportSource,
+    dampened: bool = True
+) -> Generator[Tuple[bool, Optional[bool]], None, None]:
+    """Yield the safety verdicts of each report.
+
+    Parameters
+    ----------
+    source : ReportSource
+        Input filepath, open binary stream or
+        iterable of already parsed reports.
+    dampened : bool
+        If `False`, skip the dampened check and
+        yield `None` in its place.
+
+    Returns
+    -------
+    Generator[Tuple[bool, Optional[bool]], None, None]
+        Generator object which yields whether each
+        report is safe, and safe after dampening.
+
+    """
+    for report in iter_reports(source):
+        strict = is_safe(report)
+        if not dampened:
+            yield strict, None
+            continue
+        yield strict, strict or is_safe_dampened(report)
+
+def get_report_metrics(
+    source: ReportSource,
+    metrics: Sequence[str] = ("strict", "dampened")
+) -> Dict[str, Any]:
+    """Compute several report metrics in one pass.
+
+    Reports are streamed from the source, so memory
+    stays bounded unless per-report verdicts are
+    requested.
+
+    Parameters
+    ----------
+    source : ReportSource
+        Input filepath, open binary stream or
+        iterable of already parsed reports.
+    metrics : Sequence[str]
+        Metrics to compute, any of `METRICS`.
+
+    Returns
+    -------
+    Dict[str, Any]
+        Number of safe reports under "strict" and
+        "dampened", list of `(strict, dampened)`
+        verdicts under "verdicts".
+
+    """
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics {sorted(unknown)}, expected any of {METRICS}.")
+    need_dampened = "dampened" in metrics or "verdicts" in metrics
+    results: Dict[str, Any] = {metric: 0 for metric in metrics}
+    if "verdicts" in metrics:
+        results["verdicts"] = []
+    for verdict in iter_report_verdicts(source, dampened=need_dampened):
+        if "strict" in results:
+            results["strict"] += verdict[0]
+        if "dampened" in results:
+            results["dampened"] += verdict[1]
+        if "verdicts" in results:
+            results["verdicts"].append(verdict)
+    return results
+
+def _safe_step_masks(levels: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Get masks of safe increasing and decreasing steps."""
+    diffs = levels[:, 1:] - levels[:, :-1]
+    return (diffs >= 1) & (diffs <= 3), (diffs <= -1) & (diffs >= -3)
+
+def _count_bucket_np(levels: "np.ndarray") -> Tuple[int, int]:
+    """Count the safe reports of a matrix of same-length reports."""
+    num_levels = levels.shape[1]
+    if num_levels <= 1:
+        return len(levels), len(levels)
+    step_masks = _safe_step_masks(levels)
+    if num_levels == 2:
+        return int((step_masks[0] | step_masks[1]).sum()), len(levels)
+    bridges = levels[:, 2:] - levels[:, :-2]
+    bridge_masks = ((bridges >= 1) & (bridges <= 3), (bridges <= -1) & (bridges >= -3))
+    strict = np.zeros(len(levels), dtype=bool)
+    dampened = np.zeros(len(levels), dtype=bool)
+    for good, bridge_good in zip(step_masks, bridge_masks):
+        # prefix[:, j] is True when steps 0..j-1 are safe,
+        # suffix[:, j] is True when steps j..end are safe.
+        ones = np.ones((len(levels), 1), dtype=bool)
+        prefix = np.hstack([ones, np.logical_and.accumulate(good, axis=1)])
+        suffix = np.hstack([np.logical_and.accumulate(good[:, ::-1], axis=1)[:, ::-1], ones])
+        strict |= prefix[:, -1]
+        # Removing level k drops steps k-1 and k and bridges levels k-1 and k+1.
+        candidates = np.empty((len(levels), num_levels), dtype=bool)
+        candidates[:, 0] = suffix[:, 1]
+        candidates[:, -1] = prefix[:, -2]
+        candidates[:, 1:-1] = prefix[:, :-2] & bridge_good & suffix[:, 2:]
+        dampened |= candidates.any(axis=1)
+    return int(strict.sum()), int(dampened.sum())
+
+def count_safe_reports_np(inp_path: str) -> Tuple[int, int]:
+    """Get the number of safe reports using NumPy.
+
+    All reports are loaded once into matrices of
+    same-length reports, and every step and every
+    single-level removal is checked with vectorized
+    masks.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input filepath.
+
+    Returns
+    -------
+    int
+        The number of safe reports.
+    int
+        The number of safe reports after dampening.
+
+    """
+    if np is None:
+        raise ImportError("Batched evaluation requires NumPy to be installed.")
+    buckets: Dict[int, List[List[int]]] = {}
+    for report in read_reports(inp_path):
+        if report:
+            buckets.setdefault(len(report), []).append(report)
+    strict_total = 0
+    dampened_total = 0
+    for reports in buckets.values():
+        strict, dampened = _count_bucket_np(np.array(reports, dtype=np.int64))
+        strict_total += strict
+        dampened_total += dampened
+    return strict_total, dampened_total
 
 def main() -> None:
     """Script main function."""
+    results = get_report_metrics(INPUT_PATH)
     print("Part I")
     print("-------")
-    outp = get_num_safe_reports()
-    print(f"Result: {outp}")
+    print(f"Result: {results['strict']}")
     print("======================")
     print("Part II")
     print("-------")
-    outp = get_num_safe_reports(dampened=True)
-    print(f"Result: {outp}")
+    print(f"Result: {results['dampened']}")
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,39 @@
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
 import re
-from typing import Generator, List
+from typing import Generator, List, Optional, Tuple
 
 INPUT_PATH = "inp.txt"
+TOKEN_PATTERN = re.compile(rb"mul\((\d{1,3}),(\d{1,3})\)|(do\(\))|(don't\(\))")
+MAX_TOKEN_LENGTH = len("mul(123,123)")
+
+class DisabledRegions:
+    """Sorted index of disabled `[start, end)` spans.
+
+    Parameters
+    ----------
+    spans : List[Tuple[int, int]]
+        Non-overlapping spans, sorted by start.
+
+    """
+
+    def __init__(self, spans: List[Tuple[int, int]]) -> None:
+        self.starts = [start for start, _ in spans]
+        self.ends = [end for _, end in spans]
+
+    def __contains__(self, offset: int) -> bool:
+        idx = bisect_right(self.starts, offset) - 1
+        return idx >= 0 and offset < self.ends[idx]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def spans(self) -> List[Tuple[int, int]]:
+        """The disabled spans."""
+        return list(zip(self.starts, self.ends))
 
 def read_data(inp_path: str) -> str:
     """Read input data.
@@ -45,7 +77,7 @@ def parse_data(pattern_str: str, inp_data: str) -> Generator[re.Match, None, Non
     for valid in re.finditer(pattern, inp_data):
         yield valid
 
-def get_ignore_indices(inp_data: str) -> List[int]:
+def get_ignore_indices(inp_data: str) -> DisabledRegions:
     """Extract the text indices that should be ignored.
     
     Parameters
@@ -55,15 +87,14 @@ def get_ignore_indices(inp_data: str) -> List[int]:
     
     Returns
     -------
-    List[int]
-        List of string indices to ignore.
+    DisabledRegions
+        Index of the string spans to ignore.
 
     """
     pattern_str = r"do(n\'t)?\(\)"
     start = None
-    # stop = None
     enabled = True
-    ignore = []
+    spans = []
     for valid in parse_data(pattern_str, inp_data):
         if valid.group(1) is not None:
             if enabled:
@@ -71,11 +102,11 @@ def get_ignore_indices(inp_data: str) -> List[int]:
                 enabled = False
         else:
             if not enabled:
-                ignore.extend([*range(start, valid.start())])
+                spans.append((start, valid.start()))
                 enabled = True
     if not enabled:
-        ignore.extend([*range(start, len(inp_data))])
-    return ignore
+        spans.append((start, len(inp_data)))
+    return DisabledRegions(spans)
 
 
 def sum_mul_operations(inp_data: str, conditional: bool = False) -> int:
@@ -95,7 +126,7 @@ def sum_mul_operations(inp_data: str, conditional: bool = False) -> int:
 
     """
     total = 0
-    ignore_idx = []
+    ignore_idx = DisabledRegions([])
     if conditional:
         ignore_idx = get_ignore_indices(inp_data)
     pattern_str = r"mul\((\d{1,3}),(\d{1,3})\)"
@@ -106,6 +137,168 @@ def sum_mul_operations(inp_data: str, conditional: bool = False) -> int:
         total += int(valid.group(1))*int(valid.group(2))
     return total
 
+def sum_mul_operations_stream(inp_path: str, chunk_size: int = 1 << 16) -> Tuple[int, int]:
+    """Calculate both mul operation sums in one streaming pass.
+
+    The input is read in fixed-size byte chunks and
+    scanned with a single pattern for `mul(a,b)`,
+    `do()` and `don't()`. Matches may only start where
+    a full token still fits in the buffer, the
+    remaining tail is carried over to the next chunk.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input filepath.
+    chunk_size : int
+        Number of bytes read at a time.
+
+    Returns
+    -------
+    int
+        The sum of all valid mul operations.
+    int
+        The sum of all enabled mul operations.
+
+    """
+    if chunk_size < 1:
+        raise ValueError("Chunk size must be positive.")
+    total = 0
+    conditional_total = 0
+    enabled = True
+    carry = b""
+    with open(inp_path, "rb") as input_file:
+        at_eof = False
+        while not at_eof:
+            chunk = input_file.read(chunk_size)
+            at_eof = not chunk
+            buffer = carry + chunk
+            # A token starting before `limit` is fully contained in the buffer.
+            limit = len(buffer) if at_eof else len(buffer) - MAX_TOKEN_LENGTH + 1
+            resume = 0
+            for token in TOKEN_PATTERN.finditer(buffer):
+                if token.start() >= limit:
+                    break
+                resume = token.end()
+                if token.group(3) is not None:
+                    enabled = True
+                elif token.group(4) is not None:
+                    enabled = False
+                else:
+                    product = int(token.group(1))*int(token.group(2))
+                    total += product
+                    if enabled:
+                        conditional_total += product
+            carry = buffer[max(resume, limit):]
+    return total, conditional_total
+
+def _scan_segment(
+    inp_path: str,
+    start: int,
+    stop: int
+) -> Tuple[int, int, int, Optional[bool]]:
+    """Scan one segment of the input.
+
+    Tokens starting in `[start, stop)` are evaluated,
+    reading past `stop` just far enough to complete them.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input filepath.
+    start : int
+        Byte offset of the start of the segment.
+    stop : int
+        Byte offset of the end of the segment.
+
+    Returns
+    -------
+    int
+        The sum of all mul operations.
+    int
+        The sum of enabled mul operations if the
+        segment starts enabled.
+    int
+        The sum of enabled mul operations if the
+        segment starts disabled.
+    Optional[bool]
+        The enabled state at the end of the segment,
+        `None` if the segment holds no do/don't.
+
+    """
+    total = 0
+    sums = [0, 0]
+    states = [True, False]
+    final_state = None
+    with open(inp_path, "rb") as input_file:
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            end = min(stop + MAX_TOKEN_LENGTH - 1, len(mapped))
+            for token in TOKEN_PATTERN.finditer(mapped, start, end):
+                if token.start() >= stop:
+                    break
+                if token.group(3) is not None:
+                    final_state = states[0] = states[1] = True
+                elif token.group(4) is not None:
+                    final_state = states[0] = states[1] = False
+                else:
+                    product = int(token.group(1))*int(token.group(2))
+                    total += product
+                    for idx, enabled in enumerate(states):
+                        if enabled:
+                            sums[idx] += product
+    return total, sums[0], sums[1], final_state
+
+def sum_mul_operations_parallel(
+    inp_path: str,
+    max_workers: Optional[int] = None,
+    segment_size: int = 16*1024*1024
+) -> Tuple[int, int]:
+    """Calculate both mul operation sums using a process pool.
+
+    The memory-mapped input is split into segments
+    which are scanned in worker processes. Each
+    worker reports its sums for both possible
+    starting states along with its final state, and
+    the conditional sum is resolved with a prefix
+    scan over the segments.
+
+    Parameters
+    ----------
+    inp_path : str
+        Input filepath.
+    max_workers : Optional[int]
+        Number of worker processes, defaults to
+        the number of processors on the machine.
+    segment_size : int
+        Number of bytes per segment.
+
+    Returns
+    -------
+    int
+        The sum of all valid mul operations.
+    int
+        The sum of all enabled mul operations.
+
+    """
+    if segment_size < 1:
+        raise ValueError("Segment size must be positive.")
+    file_size = os.path.getsize(inp_path)
+    bounds = [(start, min(start + segment_size, file_size))
+              for start in range(0, file_size, segment_size)]
+    total = 0
+    conditional_total = 0
+    enabled = True
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_scan_segment, inp_path, start, stop)
+                   for start, stop in bounds]
+        for future in futures:
+            seg_total, sum_enabled, sum_disabled, final_state = future.result()
+            total += seg_total
+            conditional_total += sum_enabled if enabled else sum_disabled
+            if final_state is not None:
+                enabled = final_state
+    return total, conditional_total
+
 def main() -> None:
     """Script main function."""
     inp_data = read_data(INPUT_PATH)
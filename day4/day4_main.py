@@ -1,8 +1,19 @@
-from typing import List, Tuple
-from itertools import product
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Generator, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 INPUT_PATH = "inp.txt"
 EMPTY = "."
+ENGINES = ("python", "numpy")
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+ByteBuffer = Union[bytes, bytearray]
 
 def read_data(inp_path: str) -> List[List[str]]:
     """Read input data.
@@ -28,15 +39,78 @@ def read_data(inp_path: str) -> List[List[str]]:
     data_grid.append(border_row)
     return data_grid
 
-def search_grid_for_pattern(grid: List[str], pattern: str = "XMAS") -> int:
+class FlatGrid:
+    """Padded grid stored as one flat byte buffer.
+
+    Cell `(row, col)` lives at `row*stride + col`, so
+    each of the 8 directions is a single integer offset.
+
+    Parameters
+    ----------
+    data : bytearray
+        Padded grid bytes in row-major order.
+    stride : int
+        Length of one padded row.
+
+    """
+
+    def __init__(self, data: bytearray, stride: int) -> None:
+        if stride < 1 or len(data) % stride:
+            raise ValueError("Grid data must hold a whole number of rows.")
+        self.data = data
+        self.stride = stride
+        self.nrows = len(data)//stride
+
+    @classmethod
+    def from_file(cls, inp_path: str) -> "FlatGrid":
+        """Load and pad a grid straight from the input file."""
+        pad = ord(EMPTY)
+        data = bytearray()
+        stride = None
+        with open(inp_path, "rb") as input_file:
+            for line in input_file:
+                line = line.strip()
+                if not line:
+                    continue
+                if stride is None:
+                    stride = len(line) + 2
+                    data.extend(bytes([pad])*stride)
+                data.append(pad)
+                data.extend(line)
+                data.append(pad)
+        if stride is None:
+            raise ValueError("Input holds no grid rows.")
+        data.extend(bytes([pad])*stride)
+        return cls(data, stride)
+
+    @classmethod
+    def from_rows(cls, grid: List[str]) -> "FlatGrid":
+        """Wrap an already padded grid from `read_data`."""
+        return cls(bytearray("".join(grid).encode("ascii")), len(grid[0]))
+
+def _as_flat_grid(grid: Union[List[str], FlatGrid]) -> FlatGrid:
+    return grid if isinstance(grid, FlatGrid) else FlatGrid.from_rows(grid)
+
+def search_grid_for_pattern(
+    grid: Union[List[str], FlatGrid],
+    pattern: str = "XMAS",
+    processes: int = 1,
+    band_rows: Optional[int] = None
+) -> int:
     """Search the grid for the given pattern.
     
     Parameters
     ----------
-    grid : List[str]
+    grid : Union[List[str], FlatGrid]
         The grid to search.
     pattern : str
         The pattern to search for.
+    processes : int
+        Number of worker processes, values above 1
+        search row bands of the grid in parallel.
+    band_rows : Optional[int]
+        Number of rows per band in parallel mode,
+        defaults to an even split across processes.
 
     Returns
     -------
@@ -45,27 +119,29 @@ def search_grid_for_pattern(grid: List[str], pattern: str = "XMAS") -> int:
         in the grid.
     
     """
+    flat = _as_flat_grid(grid)
+    if processes > 1:
+        return _search_tiled(flat, pattern, False, processes, band_rows)
+    return _count_pattern(flat.data, flat.stride, pattern, 0, len(flat.data))
+
+def _count_pattern(data: ByteBuffer, stride: int, pattern: str, lo: int, hi: int) -> int:
+    """Count the pattern matches starting at indices `[lo, hi)` of the buffer."""
+    offsets = [ystep*stride + xstep for ystep, xstep in DIRECTIONS]
+    pattern_bytes = pattern.encode("ascii")
+    pattern_len = len(pattern_bytes)
     total = 0
-    mask = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    for row, col in product(range(len(grid)), range(len(grid[0]))):
-        if grid[row][col] == EMPTY:
-            continue
-        if grid[row][col] == pattern[0]:
-            for xstep, ystep in mask:
-                idx = 1
-                pos = (row + ystep, col + xstep)
-                match_found = False
-                if grid[pos[0]][pos[1]] == EMPTY:
-                    continue
-                while idx < len(pattern):
-                    if grid[pos[0]][pos[1]] == pattern[idx]:
-                        idx += 1
-                        pos = (pos[0] + ystep, pos[1] + xstep)
-                        match_found = idx == len(pattern)
-                        continue
-                    break
-                if match_found:
-                    total += 1
+    start = data.find(pattern_bytes[0], lo, hi)
+    while start != -1:
+        for offset in offsets:
+            idx = 1
+            pos = start + offset
+            # The EMPTY border stops every walk before it leaves the buffer.
+            while idx < pattern_len and data[pos] == pattern_bytes[idx]:
+                idx += 1
+                pos += offset
+            if idx == pattern_len:
+                total += 1
+        start = data.find(pattern_bytes[0], start + 1, hi)
     return total
 
 # def check_line(grid: List[str], pattern: str, start_pos: Tuple[int, int], step: Tuple[int, int]) -> bool:
@@ -88,15 +164,26 @@ def search_grid_for_pattern(grid: List[str], pattern: str = "XMAS") -> int:
     
 #     """
 
-def search_grid_for_x_pattern(grid: List[str], pattern: str = "MAS") -> int:
+def search_grid_for_x_pattern(
+    grid: Union[List[str], FlatGrid],
+    pattern: str = "MAS",
+    processes: int = 1,
+    band_rows: Optional[int] = None
+) -> int:
     """Search the grid for the given pattern in X shapes.
     
     Parameters
     ----------
-    grid : List[str]
+    grid : Union[List[str], FlatGrid]
         The grid to search.
     pattern : str
         The pattern to search for.
+    processes : int
+        Number of worker processes, values above 1
+        search row bands of the grid in parallel.
+    band_rows : Optional[int]
+        Number of rows per band in parallel mode,
+        defaults to an even split across processes.
 
     Returns
     -------
@@ -107,46 +194,371 @@ def search_grid_for_x_pattern(grid: List[str], pattern: str = "MAS") -> int:
     """
     if not len(pattern) % 2 == 1:
         raise ValueError("Pattern must have an odd number of characters.")
+    flat = _as_flat_grid(grid)
+    if processes > 1:
+        return _search_tiled(flat, pattern, True, processes, band_rows)
+    return _count_x_pattern(flat.data, flat.stride, pattern, 0, len(flat.data), 0, flat.nrows)
+
+def _count_x_pattern(
+    data: ByteBuffer,
+    stride: int,
+    pattern: str,
+    lo: int,
+    hi: int,
+    first_row: int,
+    total_rows: int
+) -> int:
+    """Count the X matches centered at indices `[lo, hi)` of the buffer.
+
+    `first_row` is the grid row held at the start of
+    the buffer and `total_rows` the grid height.
+    """
+    total = 0
+    leg_length = center_idx = (len(pattern) - 1)//2
+    forward = pattern.encode("ascii")
+    valid_patterns = (forward, forward[::-1])
+    pos_step = stride + 1
+    neg_step = stride - 1
+    pos_reach = leg_length*pos_step
+    neg_reach = leg_length*neg_step
+    start = data.find(forward[center_idx], lo, hi)
+    while start != -1:
+        row, col = divmod(start, stride)
+        row += first_row
+        if (leg_length <= row < total_rows - leg_length
+                and leg_length <= col < stride - leg_length
+                and data[start - pos_reach:start + pos_reach + 1:pos_step] in valid_patterns
+                and data[start - neg_reach:start + neg_reach + 1:neg_step] in valid_patterns):
+            total += 1
+        start = data.find(forward[center_idx], start + 1, hi)
+    return total
+
+def _search_band(
+    shm_name: str,
+    stride: int,
+    total_rows: int,
+    pattern: str,
+    x_shape: bool,
+    row_start: int,
+    row_stop: int
+) -> int:
+    """Search one row band of a grid held in shared memory.
+
+    Matches are owned by the band holding their start
+    (or center) cell, the halo rows around the band
+    are only read.
+    """
+    halo = len(pattern) - 1
+    first_row = max(0, row_start - halo)
+    last_row = min(total_rows, row_stop + halo)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        band = bytes(shm.buf[first_row*stride:last_row*stride])
+    finally:
+        shm.close()
+    lo = (row_start - first_row)*stride
+    hi = (row_stop - first_row)*stride
+    if x_shape:
+        return _count_x_pattern(band, stride, pattern, lo, hi, first_row, total_rows)
+    return _count_pattern(band, stride, pattern, lo, hi)
+
+def _search_tiled(
+    flat: FlatGrid,
+    pattern: str,
+    x_shape: bool,
+    processes: int,
+    band_rows: Optional[int]
+) -> int:
+    """Search a grid in parallel row bands over shared memory."""
+    if band_rows is None:
+        band_rows = -(-flat.nrows//processes)
+    if band_rows < 1:
+        raise ValueError("Band rows must be positive.")
+    shm = shared_memory.SharedMemory(create=True, size=len(flat.data))
+    try:
+        shm.buf[:len(flat.data)] = flat.data
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(_search_band, shm.name, flat.stride, flat.nrows,
+                                pattern, x_shape, row, min(row + band_rows, flat.nrows))
+                for row in range(0, flat.nrows, band_rows)
+            ]
+            return sum(future.result() for future in futures)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def grid_to_array(grid: List[str]) -> "np.ndarray":
+    """Convert a grid into a 2-D `uint8` array.
+
+    Parameters
+    ----------
+    grid : List[str]
+        The grid to convert.
+
+    Returns
+    -------
+    np.ndarray
+        The grid characters as byte values.
+
+    """
+    if np is None:
+        raise ImportError("The numpy engine requires NumPy to be installed.")
+    data = "".join(grid).encode("ascii")
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(grid), len(grid[0]))
+
+def _match_line(
+    arr: "np.ndarray",
+    pattern: bytes,
+    rows: Tuple[int, int],
+    cols: Tuple[int, int],
+    step: Tuple[int, int]
+) -> "np.ndarray":
+    """Match a pattern along a direction for a window of start cells."""
+    mask = np.ones((rows[1] - rows[0], cols[1] - cols[0]), dtype=bool)
+    for idx, char in enumerate(pattern):
+        row0 = rows[0] + idx*step[0]
+        col0 = cols[0] + idx*step[1]
+        mask &= arr[row0:row0 + mask.shape[0], col0:col0 + mask.shape[1]] == char
+    return mask
+
+def search_grid_for_pattern_np(grid: List[str], pattern: str = "XMAS") -> int:
+    """Search the grid for the given pattern using NumPy.
+
+    Vectorized equivalent of `search_grid_for_pattern`,
+    each direction is matched with shifted-slice
+    equality masks.
+
+    Parameters
+    ----------
+    grid : List[str]
+        The grid to search.
+    pattern : str
+        The pattern to search for.
+
+    Returns
+    -------
+    int
+        The number of time the pattern appears
+        in the grid.
+
+    """
+    arr = grid_to_array(grid)
+    nrows, ncols = arr.shape
+    reach = len(pattern) - 1
+    pattern_bytes = pattern.encode("ascii")
     total = 0
-    leg_length = center_idx = int((len(pattern) - 1)/2)
-    valid_term = (pattern[0], pattern[-1])
-    for row, col in product(range(len(grid)), range(len(grid[0]))):
-        if grid[row][col] == EMPTY:
+    for ystep, xstep in DIRECTIONS:
+        rows = (max(0, -reach*ystep), nrows - max(0, reach*ystep))
+        cols = (max(0, -reach*xstep), ncols - max(0, reach*xstep))
+        if rows[0] >= rows[1] or cols[0] >= cols[1]:
             continue
-        if grid[row][col] == pattern[center_idx]:
-            if row - leg_length < 0 or row + leg_length >= len(grid):
-                continue
-            if col - leg_length < 0 or col + leg_length >= len(grid[0]):
-                continue
-            term_pos = grid[row - leg_length][col - leg_length]
-            term_neg = grid[row - leg_length][col + leg_length]
-            if term_pos == EMPTY or term_pos not in valid_term:
-                continue
-            if term_neg == EMPTY or term_neg not in valid_term:
-                continue
-            pos_pattern = pattern if term_pos == pattern[0] else pattern[::-1]
-            neg_pattern = pattern if term_neg == pattern[0] else pattern[::-1]
-            pos_str = ""
-            neg_str = ""
-            for step in range(leg_length, -(leg_length + 1), -1):
-                pos_str += grid[row - step][col - step]
-                neg_str += grid[row - step][col + step]
-            if pos_str == pos_pattern and neg_str == neg_pattern:
-                total += 1
+        total += int(_match_line(arr, pattern_bytes, rows, cols, (ystep, xstep)).sum())
     return total
 
+def search_grid_for_x_pattern_np(grid: List[str], pattern: str = "MAS") -> int:
+    """Search the grid for the given pattern in X shapes using NumPy.
+
+    Vectorized equivalent of `search_grid_for_x_pattern`,
+    both diagonals are matched forwards and backwards
+    with slices anchored at the four corners.
+
+    Parameters
+    ----------
+    grid : List[str]
+        The grid to search.
+    pattern : str
+        The pattern to search for.
+
+    Returns
+    -------
+    int
+        The number of time the pattern appears
+        in the grid.
+
+    """
+    if not len(pattern) % 2 == 1:
+        raise ValueError("Pattern must have an odd number of characters.")
+    arr = grid_to_array(grid)
+    nrows, ncols = arr.shape
+    leg_length = (len(pattern) - 1)//2
+    if nrows <= 2*leg_length or ncols <= 2*leg_length:
+        return 0
+    forward = pattern.encode("ascii")
+    backward = forward[::-1]
+    rows = (0, nrows - 2*leg_length)
+    # Down-right diagonal from the top-left corner,
+    # down-left diagonal from the top-right corner.
+    left_cols = (0, ncols - 2*leg_length)
+    right_cols = (2*leg_length, ncols)
+    pos_diag = (_match_line(arr, forward, rows, left_cols, (1, 1))
+                | _match_line(arr, backward, rows, left_cols, (1, 1)))
+    neg_diag = (_match_line(arr, forward, rows, right_cols, (1, -1))
+                | _match_line(arr, backward, rows, right_cols, (1, -1)))
+    return int((pos_diag & neg_diag).sum())
+
+class AhoCorasick:
+    """Aho-Corasick automaton counting many words in one scan.
+
+    Node visits are tallied during the scan and pushed
+    up the failure links once at the end, so the scan
+    cost does not depend on the number of words.
+
+    Parameters
+    ----------
+    words : Iterable[str]
+        The words to search for.
+
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.word_nodes: Dict[str, int] = {}
+        for word in words:
+            if not word:
+                raise ValueError("Words must not be empty.")
+            self.word_nodes[word] = self._add_word(word)
+        self.order = self._build_fail_links()
+
+    def _add_word(self, word: str) -> int:
+        node = 0
+        for char in word:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+            node = nxt
+        return node
+
+    def _build_fail_links(self) -> List[int]:
+        order = []
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for char, child in self.goto[node].items():
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                queue.append(child)
+        return order
+
+    def count(self, lines: Iterable[str]) -> Dict[str, int]:
+        """Count the occurrences of each word in the lines.
+
+        Parameters
+        ----------
+        lines : Iterable[str]
+            The lines to scan, matches do not span lines.
+
+        Returns
+        -------
+        Dict[str, int]
+            Number of occurrences of each word.
+
+        """
+        goto = self.goto
+        fail = self.fail
+        visits = [0]*len(goto)
+        for line in lines:
+            node = 0
+            for char in line:
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+                visits[node] += 1
+        for node in reversed(self.order):
+            visits[fail[node]] += visits[node]
+        return {word: visits[node] for word, node in self.word_nodes.items()}
 
-def main() -> None:
-    """Script main function."""
-    inp_data = read_data(INPUT_PATH)
+def get_grid_lines(grid: List[str]) -> Generator[str, None, None]:
+    """Yield every row, column and diagonal of the grid.
+
+    Each line is yielded in both reading directions.
+
+    Parameters
+    ----------
+    grid : List[str]
+        The grid to split into lines.
+
+    Returns
+    -------
+    Generator[str, None, None]
+        Generator object which yields the lines.
+
+    """
+    nrows = len(grid)
+    ncols = len(grid[0])
+    for line in grid:
+        yield line
+        yield line[::-1]
+    for col in range(ncols):
+        line = "".join(grid[row][col] for row in range(nrows))
+        yield line
+        yield line[::-1]
+    for offset in range(-(ncols - 1), nrows):
+        rows = range(max(0, offset), min(nrows, ncols + offset))
+        line = "".join(grid[row][row - offset] for row in rows)
+        yield line
+        yield line[::-1]
+    for offset in range(nrows + ncols - 1):
+        rows = range(max(0, offset - ncols + 1), min(nrows, offset + 1))
+        line = "".join(grid[row][offset - row] for row in rows)
+        yield line
+        yield line[::-1]
+
+def search_grid_for_words(grid: List[str], words: Iterable[str]) -> Dict[str, int]:
+    """Search the grid for many patterns at once.
+
+    Every row, column and diagonal is scanned in both
+    directions by a single Aho-Corasick automaton.
+
+    Parameters
+    ----------
+    grid : List[str]
+        The grid to search.
+    words : Iterable[str]
+        The patterns to search for.
+
+    Returns
+    -------
+    Dict[str, int]
+        The number of times each pattern appears
+        in the grid.
+
+    """
+    return AhoCorasick(words).count(get_grid_lines(grid))
+
+
+def main(engine: str = "python") -> None:
+    """Script main function.
+
+    Parameters
+    ----------
+    engine : str
+        Search backend, one of `ENGINES`.
+
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}.")
+    if engine == "numpy":
+        search_func, x_search_func = search_grid_for_pattern_np, search_grid_for_x_pattern_np
+        inp_data = read_data(INPUT_PATH)
+    else:
+        search_func, x_search_func = search_grid_for_pattern, search_grid_for_x_pattern
+        inp_data = FlatGrid.from_file(INPUT_PATH)
     print("Part I")
     print("-------")
-    outp = search_grid_for_pattern(inp_data)
+    outp = search_func(inp_data)
     print(f"Result: {outp}")
     print("======================")
     print("Part II")
     print("-------")
-    outp = search_grid_for_x_pattern(inp_data)
+    outp = x_search_func(inp_data)
     print(f"Result: {outp}")
 
 if __name__ == "__main__":
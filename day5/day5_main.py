@@ -1,8 +1,207 @@
-from typing import List, Dict, Set, Tuple
+from collections import deque
+import hashlib
+from itertools import chain
+import json
+import os
+from typing import Generator, Iterator, List, Dict, Optional, Set, TextIO, Tuple, Union
 
 INPUT_PATH = "inp.txt"
+CACHE_DIR = ".rules_cache"
+CACHE_VERSION = 1
 RULE_DELIM = "|"
 INSTR_DELIM = ","
+UNRULED = -1
+
+class CompiledRules:
+    """Ordering rules over interned integer page IDs.
+
+    Each page is interned to a dense integer ID and the
+    pages that must precede it are stored as a bitmask,
+    so rule checks against a whole update are single
+    bitwise operations. Pages without any rules are
+    encoded as `UNRULED`, which has no bit and no
+    predecessors, so validating updates never adds
+    new IDs.
+
+    Parameters
+    ----------
+    lut : Dict[str, Set[str]]
+        Page ordering rules lookup table.
+
+    """
+
+    def __init__(self, lut: Dict[str, Set[str]]) -> None:
+        self.page_ids: Dict[str, int] = {}
+        self.pages: List[str] = []
+        self.preceding: List[int] = []
+        for page, prev_pages in lut.items():
+            mask = 0
+            for prev_page in prev_pages:
+                mask |= 1 << self.intern(prev_page)
+            self.preceding[self.intern(page)] |= mask
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List]) -> "CompiledRules":
+        """Rebuild compiled rules from `to_dict` output."""
+        rules = cls({})
+        for page in data["pages"]:
+            rules.intern(page)
+        rules.preceding = [int(mask, 16) for mask in data["preceding"]]
+        return rules
+
+    def to_dict(self) -> Dict[str, List]:
+        """Get a JSON serializable form of the compiled rules."""
+        return {"pages": self.pages, "preceding": [format(mask, "x") for mask in self.preceding]}
+
+    def intern(self, page: str) -> int:
+        """Get the ID of a rule page, assigning a new one if needed."""
+        page_id = self.page_ids.get(page)
+        if page_id is None:
+            page_id = len(self.pages)
+            self.page_ids[page] = page_id
+            self.pages.append(page)
+            self.preceding.append(0)
+        return page_id
+
+    def encode(self, upd: List[str]) -> List[int]:
+        """Convert a page update into page IDs without adding new ones."""
+        return [self.page_ids.get(page, UNRULED) for page in upd]
+
+    def _mask(self, ids: List[int]) -> int:
+        mask = 0
+        for page_id in ids:
+            if page_id != UNRULED:
+                mask |= 1 << page_id
+        return mask
+
+    def _preceding(self, page_id: int) -> int:
+        return 0 if page_id == UNRULED else self.preceding[page_id]
+
+    def find_violation(self, ids: List[int]) -> Optional[Tuple[int, int]]:
+        """Find the first rule broken by an update of page IDs.
+
+        Parameters
+        ----------
+        ids : List[int]
+            The page update to validate.
+
+        Returns
+        -------
+        Optional[Tuple[int, int]]
+            The `(before, after)` IDs of the first broken
+            rule, `None` if the page update is valid.
+
+        """
+        last_idx = {page_id: idx for idx, page_id in enumerate(ids)}
+        after = self._mask(ids)
+        for idx, page_id in enumerate(ids):
+            if page_id == UNRULED:
+                continue
+            if last_idx[page_id] == idx:
+                after &= ~(1 << page_id)
+            broken = self.preceding[page_id] & after
+            if broken:
+                return (broken & -broken).bit_length() - 1, page_id
+        return None
+
+    def predecessor_counts(self, ids: List[int]) -> List[int]:
+        """Count the in-update predecessors of each page ID."""
+        in_update = self._mask(ids)
+        return [(self._preceding(page_id) & in_update).bit_count() for page_id in ids]
+
+    def middle_position(self, ids: List[int]) -> Optional[int]:
+        """Find the middle page of a totally ordered update of page IDs.
+
+        The rules totally order the update when the
+        in-update predecessor counts are `0..n-1` and the
+        predecessors of each page are exactly the pages
+        with a lower count.
+
+        Parameters
+        ----------
+        ids : List[int]
+            The page update.
+
+        Returns
+        -------
+        Optional[int]
+            Position in `ids` of the page with `(n-1)//2`
+            predecessors, `None` if the rules do not
+            totally order the update.
+
+        """
+        in_update = self._mask(ids)
+        pred_masks = [self._preceding(page_id) & in_update for page_id in ids]
+        counts = [mask.bit_count() for mask in pred_masks]
+        count_bits = [0]*len(ids)
+        seen_counts = 0
+        for page_id, count in zip(ids, counts):
+            if count >= len(ids) or seen_counts >> count & 1:
+                return None
+            seen_counts |= 1 << count
+            count_bits[count] = 0 if page_id == UNRULED else 1 << page_id
+        below = 0
+        for count, bit in enumerate(count_bits):
+            # Reuse the slot for the pages with a lower count.
+            count_bits[count] = below
+            below |= bit
+        for mask, count in zip(pred_masks, counts):
+            if mask != count_bits[count]:
+                return None
+        return counts.index((len(ids) - 1)//2)
+
+    def fix(self, ids: List[int]) -> List[int]:
+        """Order an update of page IDs by the rules.
+
+        See `fix_order`.
+        """
+        return [ids[idx] for idx in self.fix_order(ids)]
+
+    def fix_order(self, ids: List[int]) -> List[int]:
+        """Get the positions of an update of page IDs in fixed order.
+
+        Pages are sorted by their number of in-update
+        predecessors, which is exact when the rules
+        totally order the update. Otherwise the pages
+        are peeled off in layers of pages without
+        remaining predecessors.
+
+        Parameters
+        ----------
+        ids : List[int]
+            The page update to fix.
+
+        Returns
+        -------
+        List[int]
+            Positions in `ids` of the fixed page update.
+
+        Raises
+        ------
+        ValueError
+            If the rules for the update pages contain a cycle.
+
+        """
+        counts = self.predecessor_counts(ids)
+        order = sorted(range(len(ids)), key=lambda idx: counts[idx])
+        if self.find_violation([ids[idx] for idx in order]) is None:
+            return order
+        in_update = self._mask(ids)
+        order = []
+        pending = list(range(len(ids)))
+        while pending:
+            ready = [idx for idx in pending
+                     if not self._preceding(ids[idx]) & in_update & ~self._mask([ids[idx]])]
+            if not ready:
+                blocked = sorted({self.pages[ids[idx]] for idx in pending})
+                raise ValueError(f"Ordering rules contain a cycle, cannot order pages {blocked}.")
+            in_update &= ~self._mask([ids[idx] for idx in ready])
+            order.extend(ready)
+            ready_set = set(ready)
+            pending = [idx for idx in pending if idx not in ready_set]
+        return order
+
+RulesLUT = Union[Dict[str, Set[str]], CompiledRules]
 
 def read_data(inp_path: str) -> Tuple[List[str], List[str], List[List[str]]]:
     """Read input data.
@@ -63,14 +262,136 @@ def create_rules_lut(xdata: List[str], ydata: List[str]) -> Dict[str, Set[str]]:
 
     return lut
 
-def update_is_ok(upd: List[str], lut: Dict[str, Set[str]]) -> bool:
+def split_input_stream(stream: TextIO) -> Tuple[List[str], Iterator[str]]:
+    """Split an input stream into its rules and update lines.
+
+    Only the rules section is read up front, the
+    update lines are left to be streamed.
+
+    Parameters
+    ----------
+    stream : TextIO
+        Input data stream.
+
+    Returns
+    -------
+    List[str]
+        Page ordering rule lines.
+    Iterator[str]
+        Remaining lines of the stream.
+
+    """
+    rule_lines = []
+    for line in stream:
+        line = line.strip()
+        if not line:
+            if rule_lines:
+                break
+            continue
+        if RULE_DELIM not in line:
+            return rule_lines, chain([line], stream)
+        rule_lines.append(line)
+    return rule_lines, iter(stream)
+
+def load_compiled_rules(rule_lines: List[str], cache_dir: str = CACHE_DIR) -> CompiledRules:
+    """Get compiled rules, reusing a cached copy if possible.
+
+    The cache file is keyed by `CACHE_VERSION` and a
+    hash of the rule lines, so it is only reused while
+    the rules section and the cache format are
+    unchanged. Cache files that cannot be read or
+    decoded are treated as a cache miss.
+
+    Parameters
+    ----------
+    rule_lines : List[str]
+        Page ordering rule lines.
+    cache_dir : str
+        Directory holding the cached rules.
+
+    Returns
+    -------
+    CompiledRules
+        The compiled page ordering rules.
+
+    """
+    digest = hashlib.sha256("\n".join(rule_lines).encode("utf-8")).hexdigest()
+    cache_path = os.path.join(cache_dir, f"rules_v{CACHE_VERSION}_{digest}.json")
+    try:
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            payload = json.load(cache_file)
+        if payload["version"] == CACHE_VERSION:
+            return CompiledRules.from_dict(payload["rules"])
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing, unreadable or corrupt cache, compile again.
+        pass
+    xcol = []
+    ycol = []
+    for line in rule_lines:
+        tmp = line.split(RULE_DELIM)
+        xcol.append(tmp[0])
+        ycol.append(tmp[1])
+    rules = CompiledRules(create_rules_lut(xcol, ycol))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as cache_file:
+        json.dump({"version": CACHE_VERSION, "rules": rules.to_dict()}, cache_file)
+    os.replace(tmp_path, cache_path)
+    return rules
+
+def stream_update_verdicts(
+    lines: Iterator[str],
+    rules: RulesLUT
+) -> Generator[Tuple[List[str], bool, int, int, Optional[ValueError]], None, None]:
+    """Validate page updates one line at a time.
+
+    An invalid update that cannot be fixed, e.g. due to a
+    rule cycle, is reported with its error and left out
+    of the fixed sum, so the stream carries on.
+
+    Parameters
+    ----------
+    lines : Iterator[str]
+        Page update lines, e.g. from `split_input_stream`
+        or `sys.stdin`.
+    rules : RulesLUT
+        Page ordering rules lookup table.
+
+    Returns
+    -------
+    Generator[Tuple[List[str], bool, int, int, Optional[ValueError]], None, None]
+        Generator object which yields each update, whether
+        it is valid, the running sums of the middle pages
+        of valid and of fixed updates, and the error if
+        the update could not be fixed.
+
+    """
+    valid_total = 0
+    fixed_total = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        upd = line.split(INSTR_DELIM)
+        is_ok = update_is_ok(upd, rules)
+        error = None
+        if is_ok:
+            valid_total += int(upd[(len(upd) - 1)//2])
+        else:
+            try:
+                fixed_total += int(get_middle_page(upd, rules))
+            except ValueError as exc:
+                error = exc
+        yield upd, is_ok, valid_total, fixed_total, error
+
+def update_is_ok(upd: List[str], lut: RulesLUT) -> bool:
     """Determine if a page update is valid.
     
     Parameters
     ----------
     upd : List[str]
         The page update to validate.
-    lut : Dict[str, Set[str]]
+    lut : RulesLUT
         Page ordering rules lookup table.
     
     Returns
@@ -80,51 +401,140 @@ def update_is_ok(upd: List[str], lut: Dict[str, Set[str]]) -> bool:
         `False` if page update is invalid.
 
     """
-    idx = 0
-    for page in upd:
-        idx += 1
-        if page not in lut:
-            continue
-        upd_set = set(upd[idx:])
-        if upd_set & lut[page]:
-            return False
+    return find_rule_violation(upd, lut) is None
+
+def find_rule_violation(upd: List[str], lut: RulesLUT) -> Optional[Tuple[str, str]]:
+    """Find the first ordering rule broken by a page update.
+
+    Parameters
+    ----------
+    upd : List[str]
+        The page update to validate.
+    lut : RulesLUT
+        Page ordering rules lookup table.
 
-    return True
+    Returns
+    -------
+    Optional[Tuple[str, str]]
+        The `(before, after)` pages of the first broken
+        rule, `None` if the page update is valid.
+
+    """
+    if isinstance(lut, CompiledRules):
+        violation = lut.find_violation(lut.encode(upd))
+        if violation is None:
+            return None
+        return lut.pages[violation[0]], lut.pages[violation[1]]
+    position = {page: idx for idx, page in enumerate(upd)}
+    for idx, page in enumerate(upd):
+        for prev_page in lut.get(page, ()):
+            if position.get(prev_page, -1) > idx:
+                return prev_page, page
+    return None
 
-def fix_update(upd: List[str], lut: Dict[str, Set[str]]) -> List[str]:
+def fix_update(upd: List[str], lut: RulesLUT) -> List[str]:
     """Fix an invalid page update.
+
+    The rules are restricted to the pages of the update
+    and the pages are ordered with Kahn's algorithm
+    in `O(n + e)`.
     
     Parameters
     ----------
     upd : List[str]
         The invalid update to fix.
-    lut : Dict[str, Set[str]]
+    lut : RulesLUT
         Page ordering rules lookup table.
 
     Returns
     -------
     List[str]
         The fixed page update.
+
+    Raises
+    ------
+    ValueError
+        If the rules for the update pages contain a cycle.
     
     """
-    idx = 0
-    fixed = upd.copy()
-    while idx < len(fixed):
-        page = fixed[idx]
-        if page not in lut:
-            idx += 1
-            continue
-        comp = set(fixed[idx+1:])
-        to_move = comp & lut[page]
-        if to_move:
-            for inc, val in enumerate(to_move):
-                fixed.insert(idx+inc, fixed.pop(fixed.index(val)))
-            continue
-        idx += 1
+    if isinstance(lut, CompiledRules):
+        return [upd[idx] for idx in lut.fix_order(lut.encode(upd))]
+    positions: Dict[str, List[int]] = {}
+    for idx, page in enumerate(upd):
+        positions.setdefault(page, []).append(idx)
+    successors: List[List[int]] = [[] for _ in upd]
+    in_degree = [0]*len(upd)
+    for idx, page in enumerate(upd):
+        for prev_page in lut.get(page, ()):
+            for prev_idx in positions.get(prev_page, ()):
+                if prev_idx == idx:
+                    continue
+                successors[prev_idx].append(idx)
+                in_degree[idx] += 1
+    ready = deque(idx for idx, degree in enumerate(in_degree) if not degree)
+    fixed = []
+    while ready:
+        idx = ready.popleft()
+        fixed.append(upd[idx])
+        for next_idx in successors[idx]:
+            in_degree[next_idx] -= 1
+            if not in_degree[next_idx]:
+                ready.append(next_idx)
+    if len(fixed) < len(upd):
+        blocked = sorted({upd[idx] for idx, degree in enumerate(in_degree) if degree})
+        raise ValueError(f"Ordering rules contain a cycle, cannot order pages {blocked}.")
     return fixed
-            
 
-def analyze_page_updates(page_upds: List[List[str]], rules_lut: Dict[str, Set[str]]) -> int:
+
+def get_middle_page(upd: List[str], lut: RulesLUT) -> str:
+    """Get the middle page of an update once it is fixed.
+
+    When the rules totally order the update, i.e. the
+    in-update predecessor counts are `0..n-1` and every
+    in-update predecessor of a page has a lower count,
+    the middle page is the one with `(n-1)//2`
+    predecessors and no reordered update is built.
+    Otherwise the update is fixed and its middle page
+    returned, so rule cycles are still reported.
+
+    Parameters
+    ----------
+    upd : List[str]
+        The page update.
+    lut : RulesLUT
+        Page ordering rules lookup table.
+
+    Returns
+    -------
+    str
+        The middle page of the fixed update.
+
+    Raises
+    ------
+    ValueError
+        If the update is empty or the rules for the
+        update pages contain a cycle.
+
+    """
+    if not upd:
+        raise ValueError("Cannot get the middle page of an empty update.")
+    middle = (len(upd) - 1)//2
+    if isinstance(lut, CompiledRules):
+        position = lut.middle_position(lut.encode(upd))
+        if position is not None:
+            return upd[position]
+    else:
+        upd_set = set(upd)
+        counts = {page: len(lut.get(page, set()) & upd_set) for page in upd}
+        if (len(counts) == len(upd) and set(counts.values()) == set(range(len(upd)))
+                and all(counts[prev_page] < count
+                        for page, count in counts.items()
+                        for prev_page in lut.get(page, set()) & upd_set)):
+            return next(page for page, count in counts.items() if count == middle)
+    new_upd = fix_update(upd, lut)
+    return new_upd[middle]
+
+def analyze_page_updates(page_upds: List[List[str]], rules_lut: RulesLUT) -> int:
     """Analyze the proposed page updates.
     
     Function determines the validity of the proposed
@@ -135,7 +545,7 @@ def analyze_page_updates(page_upds: List[List[str]], rules_lut: Dict[str, Set[st
     ----------
     page_upds : List[List[str]]
         The proposed page updates.
-    rules_lut : Dict[str, Set[str]]
+    rules_lut : RulesLUT
         Page ordering rules lookup table.
     
     Returns
@@ -151,7 +561,7 @@ def analyze_page_updates(page_upds: List[List[str]], rules_lut: Dict[str, Set[st
             total += int(upd[(len(upd) - 1)//2])
     return total
 
-def analyze_fixed_page_updates(page_upds: List[List[str]], rules_lut: Dict[str, Set[str]]) -> int:
+def analyze_fixed_page_updates(page_upds: List[List[str]], rules_lut: RulesLUT) -> int:
     """Analyzed the fixed proposed page updates.
     
     Function fixes any proposed page updates which
@@ -163,7 +573,7 @@ def analyze_fixed_page_updates(page_upds: List[List[str]], rules_lut: Dict[str,
     ----------
     page_upds : List[List[str]]
         The proposed page updates.
-    rules_lut : Dict[str, Set[str]]
+    rules_lut : RulesLUT
         Page ordering rules lookup table.
     
     Returns
@@ -177,24 +587,26 @@ def analyze_fixed_page_updates(page_upds: List[List[str]], rules_lut: Dict[str,
     for upd in page_upds:
         if update_is_ok(upd, rules_lut):
             continue
-        new_upd = fix_update(upd, rules_lut)
-        total += int(new_upd[(len(new_upd) - 1)//2])
+        total += int(get_middle_page(upd, rules_lut))
     return total
 
 
 def main() -> None:
     """Script main function."""
-    data_xcol, data_ycol, page_upds = read_data(INPUT_PATH)
-    rules_lut = create_rules_lut(data_xcol, data_ycol)
+    valid_total = fixed_total = 0
+    with open(INPUT_PATH, "r", encoding="utf-8") as input_file:
+        rule_lines, upd_lines = split_input_stream(input_file)
+        rules_lut = load_compiled_rules(rule_lines)
+        for upd, _, valid_total, fixed_total, error in stream_update_verdicts(upd_lines, rules_lut):
+            if error is not None:
+                print(f"Skipped update {INSTR_DELIM.join(upd)}: {error}")
     print("Part I")
     print("-------")
-    outp = analyze_page_updates(page_upds, rules_lut)
-    print(f"Result: {outp}")
+    print(f"Result: {valid_total}")
     print("======================")
     print("Part II")
     print("-------")
-    outp = analyze_fixed_page_updates(page_upds, rules_lut)
-    print(f"Result: {outp}")
+    print(f"Result: {fixed_total}")
 
 if __name__ == "__main__":
     main()
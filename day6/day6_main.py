@@ -1,5 +1,8 @@
-from bisect import bisect_left, insort_left
-from typing import List, Tuple, Dict
+from array import array
+from dataclasses import dataclass
+from bisect import bisect_left, bisect_right, insort_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Dict, Union
 import time
 
 INPUT_PATH = "inp.txt"
@@ -16,6 +19,54 @@ BLOCKED_SPACE = "#"
 START_UP = "^"
 START_LEFT = ">"
 START_RIGHT = "<"
+MAP_BACKENDS = ("bisect", "table")
+
+LoopCandidate = Tuple[Tuple[int, int], Tuple[int, int], int]
+Segment = Tuple[Tuple[int, int], Tuple[int, int], int]
+
+def stop_at_block(
+    pos: Tuple[int, int],
+    bearing: int,
+    new_pos: Optional[Tuple[int, int]],
+    blk: Tuple[int, int]
+) -> Optional[Tuple[int, int]]:
+    """Shorten a jump if an extra block sits on its segment.
+
+    Parameters
+    ----------
+    pos : Tuple[int, int]
+        Position the jump starts from.
+    bearing : int
+        Direction ID of the jump.
+    new_pos : Optional[Tuple[int, int]]
+        Landing position of the jump without the
+        extra block, `None` if it leaves the map.
+    blk : Tuple[int, int]
+        Position of the extra block.
+
+    Returns
+    -------
+    Optional[Tuple[int, int]]
+        Landing position of the jump with the extra block.
+
+    """
+    if bearing == NORTH:
+        stop = -1 if new_pos is None else new_pos[0] - 1
+        if blk[1] == pos[1] and stop < blk[0] < pos[0]:
+            return (blk[0] + 1, pos[1])
+    elif bearing == SOUTH:
+        stop = float("inf") if new_pos is None else new_pos[0] + 1
+        if blk[1] == pos[1] and pos[0] < blk[0] < stop:
+            return (blk[0] - 1, pos[1])
+    elif bearing == WEST:
+        stop = -1 if new_pos is None else new_pos[1] - 1
+        if blk[0] == pos[0] and stop < blk[1] < pos[1]:
+            return (pos[0], blk[1] + 1)
+    elif bearing == EAST:
+        stop = float("inf") if new_pos is None else new_pos[1] + 1
+        if blk[0] == pos[0] and pos[1] < blk[1] < stop:
+            return (pos[0], blk[1] - 1)
+    return new_pos
 
 class PositionMap:
     def __init__(self, blocked: List[Tuple[int]]) -> None:
@@ -47,7 +98,18 @@ class PositionMap:
             return new_pos
         raise ValueError("Invalid bearing!!")
 
-    def jump_to_coord(self, pos: Tuple[int, int], bearing: int) -> Tuple[int, int]:
+    def jump_to_coord(
+        self,
+        pos: Tuple[int, int],
+        bearing: int,
+        extra: Optional[Tuple[int, int]] = None
+    ) -> Tuple[int, int]:
+        new_pos = self._jump_to_coord(pos, bearing)
+        if extra is not None:
+            new_pos = stop_at_block(pos, bearing, new_pos, extra)
+        return new_pos
+
+    def _jump_to_coord(self, pos: Tuple[int, int], bearing: int) -> Tuple[int, int]:
         new_pos = None
         if bearing == NORTH:
             potential_blks = self.col_map.get(pos[1])
@@ -112,6 +174,431 @@ class PositionMap:
         return col_map, row_map
             
 
+class JumpTableMap:
+    """Position map with precomputed jump tables.
+
+    For every cell and bearing the tables hold the flat
+    index of the cell reached before the next obstacle,
+    or -1 when the guard leaves the map, so jumps are
+    O(1). A single temporary obstacle can be added on
+    top of the tables with `add_block`.
+    """
+
+    def __init__(self, blocked: List[Tuple[int]], nrows: int, ncols: int) -> None:
+        self.nrows = nrows
+        self.ncols = ncols
+        self.is_blocked = bytearray(nrows*ncols)
+        for row, col in blocked:
+            self.is_blocked[row*ncols + col] = 1
+        self.tables: List[array] = [array("i", [-1])*(nrows*ncols) for _ in DIR_MAP]
+        self._fill_tables()
+        self.extra: Optional[Tuple[int, int]] = None
+
+    def _fill_tables(self) -> None:
+        nrows, ncols = self.nrows, self.ncols
+        blocked = self.is_blocked
+        north, east, south, west = self.tables
+        for col in range(ncols):
+            land = -1
+            for row in range(nrows):
+                idx = row*ncols + col
+                if blocked[idx]:
+                    land = idx + ncols
+                north[idx] = land
+            land = -1
+            for row in range(nrows - 1, -1, -1):
+                idx = row*ncols + col
+                if blocked[idx]:
+                    land = idx - ncols
+                south[idx] = land
+        for row in range(nrows):
+            land = -1
+            for col in range(ncols):
+                idx = row*ncols + col
+                if blocked[idx]:
+                    land = idx + 1
+                west[idx] = land
+            land = -1
+            for col in range(ncols - 1, -1, -1):
+                idx = row*ncols + col
+                if blocked[idx]:
+                    land = idx - 1
+                east[idx] = land
+
+    def jump_to_coord(
+        self,
+        pos: Tuple[int, int],
+        bearing: int,
+        extra: Optional[Tuple[int, int]] = None
+    ) -> Tuple[int, int]:
+        if not 0 <= bearing < len(DIR_MAP):
+            raise ValueError("Invalid bearing!!")
+        land = self.tables[bearing][pos[0]*self.ncols + pos[1]]
+        new_pos = None if land < 0 else divmod(land, self.ncols)
+        if self.extra is not None:
+            new_pos = stop_at_block(pos, bearing, new_pos, self.extra)
+        if extra is not None:
+            new_pos = stop_at_block(pos, bearing, new_pos, extra)
+        return new_pos
+
+    def jump_to_point(self, pos: Tuple[int, int], bearing: int) -> int:
+        new_pos = self.jump_to_coord(pos, bearing)
+        if new_pos is None:
+            return None
+        return new_pos[0] if bearing in (NORTH, SOUTH) else new_pos[1]
+
+    def add_block(self, row: int, col: int) -> None:
+        if self.extra is not None:
+            raise ValueError("Only one temporary block is supported.")
+        self.extra = (row, col)
+
+    def remove_block(self, row: int, col: int) -> None:
+        if self.extra == (row, col):
+            self.extra = None
+
+
+def build_position_map(
+    room_map: List[str],
+    blocked: List[Tuple[int, int]],
+    backend: str = "bisect"
+) -> Union[PositionMap, JumpTableMap]:
+    """Build the obstacle index for a room map.
+
+    Parameters
+    ----------
+    room_map : List[str]
+        Unprocessed room map.
+    blocked : List[Tuple[int, int]]
+        List of positions that cannot be occupied.
+    backend : str
+        Map backend, one of `MAP_BACKENDS`.
+
+    Returns
+    -------
+    Union[PositionMap, JumpTableMap]
+        The obstacle index.
+
+    """
+    if backend == "bisect":
+        return PositionMap(blocked)
+    if backend == "table":
+        return JumpTableMap(blocked, len(room_map), len(room_map[0]))
+    raise ValueError(f"Unknown map backend '{backend}', expected one of {MAP_BACKENDS}.")
+
+class TurnGraph:
+    """Precomputed graph of guard turns.
+
+    Nodes are `(cell, bearing)` states of a guard that
+    has just turned in front of an obstacle, encoded as
+    `(row*ncols + col)*4 + bearing`, and each edge is the
+    single jump to the next turn, -1 when the guard
+    leaves the room. A candidate block only redirects
+    the edges whose segment crosses it, so loop checks
+    cost time proportional to the number of turns. The
+    graph is never modified by loop checks and can be
+    shared between threads.
+    """
+
+    def __init__(
+        self,
+        pmap: PositionMap,
+        blocked: List[Tuple[int, int]],
+        nrows: int,
+        ncols: int
+    ) -> None:
+        self.pmap = pmap
+        self.nrows = nrows
+        self.ncols = ncols
+        self.next_node: Dict[int, int] = {}
+        self.line_nodes: Dict[Tuple[int, int], List[int]] = {}
+        blocked_set = set(blocked)
+        for row, col in blocked:
+            # Cell the guard stops in per approach, with the bearing after turning.
+            for cell, bearing in (((row + 1, col), EAST), ((row, col - 1), SOUTH),
+                                  ((row - 1, col), WEST), ((row, col + 1), NORTH)):
+                if cell in blocked_set or not self._in_bounds(cell):
+                    continue
+                node = self._node_id(cell, bearing)
+                if node in self.next_node:
+                    continue
+                self.next_node[node] = self._jump(cell, bearing)
+                line, coord = (cell[0], cell[1]) if bearing in (EAST, WEST) else (cell[1], cell[0])
+                self.line_nodes.setdefault((bearing, line), []).append(coord)
+        for coords in self.line_nodes.values():
+            coords.sort()
+
+    def _in_bounds(self, cell: Tuple[int, int]) -> bool:
+        return 0 <= cell[0] < self.nrows and 0 <= cell[1] < self.ncols
+
+    def _node_id(self, cell: Tuple[int, int], bearing: int) -> int:
+        return (cell[0]*self.ncols + cell[1])*4 + bearing
+
+    def _jump(
+        self,
+        cell: Tuple[int, int],
+        bearing: int,
+        blk: Optional[Tuple[int, int]] = None
+    ) -> int:
+        land = self.pmap.jump_to_coord(cell, bearing, blk)
+        return -1 if land is None else self._node_id(land, (bearing + 1)%4)
+
+    def _patch_edges(self, blk: Tuple[int, int]) -> Dict[int, int]:
+        """Redirect the edges whose segment crosses the block."""
+        patched: Dict[int, int] = {}
+        row, col = blk
+        west = self.pmap.jump_to_coord(blk, WEST)
+        east = self.pmap.jump_to_coord(blk, EAST)
+        north = self.pmap.jump_to_coord(blk, NORTH)
+        south = self.pmap.jump_to_coord(blk, SOUTH)
+        # (bearing, line, first coord, last coord, stop cell, bearing after turning)
+        approaches = [
+            (EAST, row, 0 if west is None else west[1], col - 1, (row, col - 1), SOUTH),
+            (WEST, row, col + 1, self.ncols - 1 if east is None else east[1], (row, col + 1), NORTH),
+            (SOUTH, col, 0 if north is None else north[0], row - 1, (row - 1, col), WEST),
+            (NORTH, col, row + 1, self.nrows - 1 if south is None else south[0], (row + 1, col), EAST),
+        ]
+        for bearing, line, first, last, stop_cell, new_bearing in approaches:
+            coords = self.line_nodes.get((bearing, line))
+            if not coords:
+                continue
+            target = self._node_id(stop_cell, new_bearing)
+            for idx in range(bisect_left(coords, first), bisect_right(coords, last)):
+                cell = (line, coords[idx]) if bearing in (EAST, WEST) else (coords[idx], line)
+                patched[self._node_id(cell, bearing)] = target
+        return patched
+
+    def make_visited_buffer(self) -> bytearray:
+        """Get a zeroed visited-state bitmap for `creates_loop`."""
+        return bytearray(self.nrows*self.ncols*len(DIR_MAP))
+
+    def creates_loop(
+        self,
+        start_pos: Tuple[int, int],
+        blk: Tuple[int, int],
+        bearing: int,
+        seen: Optional[bytearray] = None
+    ) -> bool:
+        """Determine if an extra block traps the guard in a loop.
+
+        Parameters
+        ----------
+        start_pos : Tuple[int, int]
+            Position of the guard in front of the block.
+        blk : Tuple[int, int]
+            Position of the extra block.
+        bearing : int
+            Direction ID of the guard after turning.
+        seen : Optional[bytearray]
+            Caller-owned zeroed bitmap from `make_visited_buffer`,
+            left zeroed on return. Visited states are kept
+            in a per-call set if not given.
+
+        Returns
+        -------
+        bool
+            `True` if the guard never leaves the room.
+
+        """
+        patched = self._patch_edges(blk)
+        visited = []
+        visited_set = set()
+        node = self._node_id(start_pos, bearing)
+        is_loop = False
+        while node >= 0:
+            if (node in visited_set) if seen is None else seen[node]:
+                is_loop = True
+                break
+            if seen is None:
+                visited_set.add(node)
+            else:
+                seen[node] = 1
+                visited.append(node)
+            nxt = patched.get(node)
+            if nxt is None:
+                nxt = self.next_node.get(node)
+            if nxt is None:
+                # Turn state only reachable because of the block.
+                cell_idx, node_bearing = divmod(node, 4)
+                nxt = self._jump(divmod(cell_idx, self.ncols), node_bearing, blk)
+                patched[node] = nxt
+            node = nxt
+        for node in visited:
+            seen[node] = 0
+        return is_loop
+
+@dataclass(frozen=True)
+class GuardResult:
+    """Outcome of simulating one guard.
+
+    Parameters
+    ----------
+    exit_point : Optional[Tuple[int, int]]
+        Last position before leaving the map, `None` for loops.
+    is_loop : bool
+        Whether the guard walks in a loop.
+    visited : int
+        Number of distinct positions visited.
+
+    """
+
+    exit_point: Optional[Tuple[int, int]]
+    is_loop: bool
+    visited: int
+
+class _Trajectory:
+    """Resolved run of segments shared by guards.
+
+    `tail` points at the trajectory (and segment index)
+    the run merged into, `cycle_start` is the index of
+    the first segment of its loop, if it loops itself.
+    """
+
+    def __init__(self, segments: List[Segment]) -> None:
+        self.segments = segments
+        self.cycle_start: Optional[int] = None
+        self.tail: Optional[Tuple["_Trajectory", int]] = None
+        self.exit_point: Optional[Tuple[int, int]] = None
+        self.is_loop = False
+
+class GuardSimulator:
+    """Simulate many guards over one shared room map.
+
+    The map is parsed and indexed once, jumps are cached
+    across guards and every guard state on a resolved
+    trajectory is remembered, so guards merging into an
+    earlier walk reuse its result.
+
+    Parameters
+    ----------
+    room_map : List[str]
+        Unprocessed room map.
+    backend : str
+        Map backend, one of `MAP_BACKENDS`.
+
+    """
+
+    def __init__(self, room_map: List[str], backend: str = "table") -> None:
+        self.nrows = len(room_map)
+        self.ncols = len(room_map[0])
+        _, _, blocked = parse_map(room_map)
+        self.pmap = build_position_map(room_map, blocked, backend)
+        self.blocked = set(blocked)
+        self.oob_ind = [0, self.ncols - 1, self.nrows - 1, 0]
+        self._jumps: Dict[int, Optional[Tuple[int, int]]] = {}
+        self._resolved: Dict[int, Tuple[_Trajectory, int]] = {}
+        self._scratch = bytearray(self.nrows*self.ncols)
+
+    def _state_id(self, pos: Tuple[int, int], bearing: int) -> int:
+        return (pos[0]*self.ncols + pos[1])*4 + bearing
+
+    def _jump(self, state: int, pos: Tuple[int, int], bearing: int) -> Optional[Tuple[int, int]]:
+        if state not in self._jumps:
+            self._jumps[state] = self.pmap.jump_to_coord(pos, bearing)
+        return self._jumps[state]
+
+    def _walk(self, pos: Tuple[int, int], bearing: int) -> Tuple[_Trajectory, int]:
+        """Walk a guard until it exits, loops or meets a resolved state."""
+        state = self._state_id(pos, bearing)
+        if state in self._resolved:
+            return self._resolved[state]
+        trajectory = _Trajectory([])
+        walk_states: Dict[int, int] = {}
+        while True:
+            if state in self._resolved:
+                tail, idx = self._resolved[state]
+                trajectory.tail = (tail, idx)
+                trajectory.exit_point = tail.exit_point
+                trajectory.is_loop = tail.is_loop
+                break
+            if state in walk_states:
+                trajectory.cycle_start = walk_states[state]
+                trajectory.is_loop = True
+                break
+            walk_states[state] = len(trajectory.segments)
+            end = self._jump(state, pos, bearing)
+            if end is None:
+                edge = self.oob_ind[bearing]
+                end = (edge, pos[1]) if bearing in (NORTH, SOUTH) else (pos[0], edge)
+                trajectory.segments.append((pos, end, bearing))
+                trajectory.exit_point = end
+                break
+            trajectory.segments.append((pos, end, bearing))
+            pos = end
+            bearing = (bearing + 1)%4
+            state = self._state_id(pos, bearing)
+        for walk_state, idx in walk_states.items():
+            self._resolved[walk_state] = (trajectory, idx)
+        return trajectory, 0
+
+    def _count_visited(self, trajectory: _Trajectory, idx: int) -> int:
+        """Count distinct positions on a trajectory from segment `idx` on.
+
+        Cells are marked on the shared scratch bitmap and
+        counted as they flip from 0 to 1; only the touched
+        segments are cleared afterwards.
+        """
+        ncols = self.ncols
+        scratch = self._scratch
+        touched = []
+        count = 0
+        while trajectory is not None:
+            if trajectory.cycle_start is not None:
+                # Every segment of a loop is walked again.
+                idx = min(idx, trajectory.cycle_start)
+            for start, end, bearing in trajectory.segments[idx:]:
+                first = min(start[0]*ncols + start[1], end[0]*ncols + end[1])
+                last = max(start[0]*ncols + start[1], end[0]*ncols + end[1])
+                step = ncols if bearing in (NORTH, SOUTH) else 1
+                cells = slice(first, last + 1, step)
+                length = (last - first)//step + 1
+                count += length - scratch[cells].count(1)
+                scratch[cells] = b"\x01"*length
+                touched.append((cells, length))
+            trajectory, idx = trajectory.tail if trajectory.tail is not None else (None, 0)
+        for cells, length in touched:
+            scratch[cells] = bytes(length)
+        return count
+
+    def simulate(self, pos: Tuple[int, int], bearing: int) -> GuardResult:
+        """Simulate a single guard.
+
+        Parameters
+        ----------
+        pos : Tuple[int, int]
+            Starting position.
+        bearing : int
+            Starting direction ID.
+
+        Returns
+        -------
+        GuardResult
+            Exit point (`None` for loops), loop flag and
+            number of distinct positions visited.
+
+        Raises
+        ------
+        ValueError
+            If the guard starts outside the map, on an
+            obstacle or with an invalid bearing.
+
+        """
+        if bearing not in range(len(DIR_MAP)):
+            raise ValueError(f"Invalid bearing {bearing!r}!!")
+        if not (0 <= pos[0] < self.nrows and 0 <= pos[1] < self.ncols):
+            raise ValueError(f"Guard start {pos} is outside the map.")
+        if tuple(pos) in self.blocked:
+            raise ValueError(f"Guard start {pos} is on an obstacle.")
+        trajectory, idx = self._walk(pos, bearing)
+        return GuardResult(
+            exit_point=trajectory.exit_point,
+            is_loop=trajectory.is_loop,
+            visited=self._count_visited(trajectory, idx)
+        )
+
+    def simulate_many(self, guards: List[Tuple[Tuple[int, int], int]]) -> List[GuardResult]:
+        """Simulate a batch of `(position, bearing)` guards."""
+        return [self.simulate(pos, bearing) for pos, bearing in guards]
+
 def read_input(inp_path: str) -> List[str]:
     """Read the input data.
     
@@ -182,83 +669,222 @@ def creates_loop(
     blk: Tuple[int, int],
     bearing: int
 ) -> bool:
-    pmap.add_block(blk[0], blk[1])
-    slow_ptr = pmap.jump_to_coord(start_pos, bearing)
+    """Determine if an extra block traps the guard in a loop.
+
+    The block is passed to the map as an overlay on
+    every jump, so the map is never modified and can
+    be shared between threads or worker processes.
+
+    Parameters
+    ----------
+    start_pos : Tuple[int, int]
+        Position of the guard in front of the block.
+    pmap : PositionMap
+        Obstacle index of the room.
+    blk : Tuple[int, int]
+        Position of the extra block.
+    bearing : int
+        Direction ID of the guard after turning.
+
+    Returns
+    -------
+    bool
+        `True` if the guard never leaves the room.
+
+    """
+    slow_ptr = pmap.jump_to_coord(start_pos, bearing, blk)
     if slow_ptr is None:
-        pmap.remove_block(blk[0], blk[1])
         return False
     slow_ptr_bearing = (bearing + 1)%4
-    fast_ptr = pmap.jump_to_coord(slow_ptr, slow_ptr_bearing)
+    fast_ptr = pmap.jump_to_coord(slow_ptr, slow_ptr_bearing, blk)
     if fast_ptr is None:
-        pmap.remove_block(blk[0], blk[1])
         return False
     fast_ptr_bearing = (slow_ptr_bearing + 1)%4
 
-    is_loop = False
     while True:
-        slow_ptr = pmap.jump_to_coord(slow_ptr, slow_ptr_bearing)
+        slow_ptr = pmap.jump_to_coord(slow_ptr, slow_ptr_bearing, blk)
         slow_ptr_bearing = (slow_ptr_bearing + 1)%4
 
-        fast_ptr = pmap.jump_to_coord(fast_ptr, fast_ptr_bearing)
+        fast_ptr = pmap.jump_to_coord(fast_ptr, fast_ptr_bearing, blk)
         if fast_ptr is None:
-            break
+            return False
         fast_ptr_bearing = (fast_ptr_bearing + 1)%4
-        fast_ptr = pmap.jump_to_coord(fast_ptr, fast_ptr_bearing)
+        fast_ptr = pmap.jump_to_coord(fast_ptr, fast_ptr_bearing, blk)
         if fast_ptr is None:
-            break
+            return False
         fast_ptr_bearing = (fast_ptr_bearing + 1)%4
         if fast_ptr == slow_ptr and fast_ptr_bearing == slow_ptr_bearing:
-            is_loop = True
-            break
-    pmap.remove_block(blk[0], blk[1])
-    return is_loop
+            return True
+
+def trace_path(
+    room_map: List[str],
+    pmap: PositionMap,
+    pos: Tuple[int, int],
+    bearing: int
+) -> Tuple[int, List[Segment]]:
+    """Trace the guard route as straight segments.
+
+    Each jump is recorded as one segment and its cells
+    are marked in a flat `bytearray` bitmap with a
+    single slice assignment.
 
-def count_distinct_positions(room_map: List[str]) -> int:
-    """Count the number of distinct positions visited.
-    
     Parameters
     ----------
     room_map : List[str]
         Unprocessed room map.
+    pmap : PositionMap
+        Obstacle index of the room.
+    pos : Tuple[int, int]
+        Starting position.
+    bearing : int
+        Starting direction ID.
 
     Returns
     -------
     int
         The number of distinct positions visited.
-    
+    List[Segment]
+        The start position, end position and
+        direction ID of every segment of the route.
+
     """
-    occupied = set()
-    oob_ind = [0, len(room_map[0]) - 1, len(room_map) - 1, 0]
-    shift_mods = [-1, 1, 1, -1]
-    shift_idx = [0, 1, 0, 1]
-    pos, bearing, blocked = parse_map(room_map)
-    pmap = PositionMap(blocked)
-    occupied.add(pos)
+    ncols = len(room_map[0])
+    visited = bytearray(len(room_map)*ncols)
+    oob_ind = [0, ncols - 1, len(room_map) - 1, 0]
+    segments = []
+    visited[pos[0]*ncols + pos[1]] = 1
     in_bounds = True
     while in_bounds:
         new_pos = pmap.jump_to_point(pos, bearing)
         if new_pos is None:
             in_bounds = False
             new_pos = oob_ind[bearing]
-        nsteps = abs(pos[shift_idx[bearing]] - new_pos)
-        sft_mod = shift_mods[bearing]
-
-        for sft in range(nsteps):
-            if bearing in [NORTH, SOUTH]:
-                occupied.add((pos[0] + sft_mod*(sft + 1), pos[1]))
-            else:
-                occupied.add((pos[0], pos[1] + sft_mod*(sft + 1)))
-        pos = (new_pos, pos[1]) if bearing in [NORTH, SOUTH] else (pos[0], new_pos)
+        end = (new_pos, pos[1]) if bearing in (NORTH, SOUTH) else (pos[0], new_pos)
+        segments.append((pos, end, bearing))
+        first = min(pos[0]*ncols + pos[1], end[0]*ncols + end[1])
+        last = max(pos[0]*ncols + pos[1], end[0]*ncols + end[1])
+        step = ncols if bearing in (NORTH, SOUTH) else 1
+        visited[first:last + 1:step] = b"\x01"*((last - first)//step + 1)
+        pos = end
         bearing = (bearing + 1)%4
-    return len(occupied)
+    return visited.count(1), segments
+
+def count_distinct_positions(room_map: List[str], backend: str = "bisect") -> int:
+    """Count the number of distinct positions visited.
+    
+    Parameters
+    ----------
+    room_map : List[str]
+        Unprocessed room map.
+    backend : str
+        Map backend, one of `MAP_BACKENDS`.
+
+    Returns
+    -------
+    int
+        The number of distinct positions visited.
+    
+    """
+    pos, bearing, blocked = parse_map(room_map)
+    pmap = build_position_map(room_map, blocked, backend)
+    return trace_path(room_map, pmap, pos, bearing)[0]
 
-def count_distinct_loop_opportunities(room_map: List[str]) -> int:
+def get_loop_candidates(
+    room_map: List[str],
+    pmap: PositionMap,
+    pos: Tuple[int, int],
+    bearing: int,
+    segments: Optional[List[Segment]] = None
+) -> List[LoopCandidate]:
+    """Collect the positions where a block could be placed.
+
+    Walks the guard route once and records, for the
+    first visit of every position, the guard state in
+    front of it.
+
+    Parameters
+    ----------
+    room_map : List[str]
+        Unprocessed room map.
+    pmap : PositionMap
+        Obstacle index of the room.
+    pos : Tuple[int, int]
+        Starting position.
+    bearing : int
+        Starting direction ID.
+    segments : Optional[List[Segment]]
+        Route from `trace_path`, traced if not given.
+
+    Returns
+    -------
+    List[LoopCandidate]
+        The guard position, block position and turned
+        bearing of every candidate.
+
+    """
+    if segments is None:
+        _, segments = trace_path(room_map, pmap, pos, bearing)
+    ncols = len(room_map[0])
+    occupied = bytearray(len(room_map)*ncols)
+    occupied[pos[0]*ncols + pos[1]] = 1
+    candidates = []
+    for start, end, seg_bearing in segments:
+        row_step, col_step = DIR_MAP[seg_bearing]
+        tmp_bearing = (seg_bearing + 1)%4
+        prev = start
+        for _ in range(abs(end[0] - start[0]) + abs(end[1] - start[1])):
+            cell = (prev[0] + row_step, prev[1] + col_step)
+            cell_idx = cell[0]*ncols + cell[1]
+            if not occupied[cell_idx]:
+                occupied[cell_idx] = 1
+                candidates.append((prev, cell, tmp_bearing))
+            prev = cell
+    return candidates
+
+_WORKER_MAP = None
+
+def _init_loop_worker(checker: Union[PositionMap, TurnGraph]) -> None:
+    global _WORKER_MAP
+    _WORKER_MAP = checker
+
+def _count_loops(candidates: List[LoopCandidate]) -> int:
+    return _count_loops_with(_WORKER_MAP, candidates)
+
+def _count_loops_with(
+    checker: Union[PositionMap, TurnGraph],
+    candidates: List[LoopCandidate]
+) -> int:
+    if isinstance(checker, TurnGraph):
+        seen = checker.make_visited_buffer()
+        return sum(checker.creates_loop(pos, blk, bearing, seen) for pos, blk, bearing in candidates)
+    return sum(creates_loop(pos, checker, blk, bearing) for pos, blk, bearing in candidates)
+
+def count_distinct_loop_opportunities(
+    room_map: List[str],
+    backend: str = "bisect",
+    processes: int = 1,
+    batch_size: int = 256,
+    turn_graph: bool = False,
+    segments: Optional[List[Segment]] = None
+) -> int:
     """Count the number of distinct positions where loops can be forced.
     
     Parameters
     ----------
     room_map : List[str]
         Unprocessed room map.
+    backend : str
+        Map backend, one of `MAP_BACKENDS`.
+    processes : int
+        Number of worker processes, values above 1
+        check the candidates in parallel.
+    batch_size : int
+        Number of candidates sent to a worker at a time.
+    turn_graph : bool
+        If `True`, check the candidates on a precomputed
+        `TurnGraph` instead of re-jumping every route.
+    segments : Optional[List[Segment]]
+        Guard route from `trace_path`, traced if not given.
 
     Returns
     -------
@@ -267,50 +893,61 @@ def count_distinct_loop_opportunities(room_map: List[str]) -> int:
         can be forced.
     
     """
-    loopable = 0
-    occupied = set()
-    oob_ind = [0, len(room_map[0]) - 1, len(room_map) - 1, 0]
-    shift_mods = [-1, 1, 1, -1]
-    shift_idx = [0, 1, 0, 1]
     pos, bearing, blocked = parse_map(room_map)
-    pmap = PositionMap(blocked)
-    occupied.add(pos)
-    in_bounds = True
-    while in_bounds:
-        new_pos = pmap.jump_to_point(pos, bearing)
-        if new_pos is None:
-            in_bounds = False
-            new_pos = oob_ind[bearing]
-        nsteps = abs(pos[shift_idx[bearing]] - new_pos)
-        sft_mod = shift_mods[bearing]
-        tmp_bearing = (bearing + 1)%4
-        for _ in range(nsteps):
-            if bearing in [NORTH, SOUTH]:
-                tmp_pos = (pos[0] + sft_mod, pos[1])
-            else:
-                tmp_pos = (pos[0], pos[1] + sft_mod)
-            if tmp_pos in occupied:
-                pos = tmp_pos
-                continue
-            occupied.add(tmp_pos)
-            if creates_loop(pos, pmap, tmp_pos, tmp_bearing):
-                loopable += 1
-            pos = tmp_pos
-        bearing = tmp_bearing
-    return loopable
-                
+    pmap = build_position_map(room_map, blocked, backend)
+    candidates = get_loop_candidates(room_map, pmap, pos, bearing, segments)
+    checker = pmap
+    if turn_graph:
+        checker = TurnGraph(pmap, blocked, len(room_map), len(room_map[0]))
+    if processes <= 1:
+        return _count_loops_with(checker, candidates)
+    batches = [candidates[idx:idx + batch_size] for idx in range(0, len(candidates), batch_size)]
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_loop_worker,
+        initargs=(checker,)
+    ) as executor:
+        return sum(executor.map(_count_loops, batches))
+
+
+def simulate_guards(
+    room_map: List[str],
+    guards: List[Tuple[Tuple[int, int], int]],
+    backend: str = "table"
+) -> List[GuardResult]:
+    """Simulate many guards against one room map.
+
+    Parameters
+    ----------
+    room_map : List[str]
+        Unprocessed room map.
+    guards : List[Tuple[Tuple[int, int], int]]
+        Starting position and direction ID of each guard.
+    backend : str
+        Map backend, one of `MAP_BACKENDS`.
+
+    Returns
+    -------
+    List[GuardResult]
+        Exit point, loop flag and number of distinct
+        positions visited for each guard.
+
+    """
+    return GuardSimulator(room_map, backend).simulate_many(guards)
+
 
 def main() -> None:
     """Script main function."""
     room_map = read_input(INPUT_PATH)
+    pos, bearing, blocked = parse_map(room_map)
+    outp, segments = trace_path(room_map, PositionMap(blocked), pos, bearing)
     print("Part I")
     print("-------")
-    outp = count_distinct_positions(room_map)
     print(f"Result: {outp}")
     print("======================")
     print("Part II")
     print("-------")
-    outp = count_distinct_loop_opportunities(room_map)
+    outp = count_distinct_loop_opportunities(room_map, segments=segments)
     print(f"Result: {outp}")
 
 if __name__ == "__main__":